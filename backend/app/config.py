@@ -17,6 +17,13 @@ class Settings(BaseSettings):
     supabase_service_key: str
     supabase_anon_key: str = ""
     
+    # Database access
+    database_backend: str = "supabase"  # "supabase" (sync client) or "postgrest" (async, pooled; opt-in)
+    database_pool_size: int = 20  # max concurrent connections to PostgREST
+    database_keepalive: int = 10  # idle connections kept open
+    database_timeout: float = 10.0  # seconds
+    database_http2: bool = True  # needs the h2 package (httpx[http2])
+    
     # CORS Configuration
     cors_origins: List[str] = [
         "http://localhost:3000",
@@ -34,11 +41,67 @@ class Settings(BaseSettings):
     
     # PDF Generation
     wkhtmltopdf_path: str = "/usr/local/bin/wkhtmltopdf"
+    pdf_render_workers: int = 2  # worker processes; 0 renders in a thread
+    pdf_render_queue_size: int = 16  # renders allowed to wait for a worker
+    pdf_job_max_pending: int = 256  # unfinished background renders before 503s
+    pdf_cache_memory_bytes: int = 64 * 1024 * 1024  # 64MB
+    pdf_cache_disk_bytes: int = 512 * 1024 * 1024  # 512MB; 0 disables the disk tier
+    pdf_cache_dir: str = ""  # defaults to a directory under the system temp dir
+    pdf_export_concurrency: int = 4  # PDFs rendered/held at once per bulk export
+    pdf_stream_chunk_size: int = 64 * 1024  # bytes per chunk when streaming PDFs
+    
+    # Media kit previews (HTML / PNG)
+    preview_cache_size: int = 512
+    preview_cache_ttl: int = 3600  # seconds
+    
+    # PDF image thumbnails
+    image_cache_dir: str = ""  # defaults to a directory under the system temp dir
+    image_cache_max_bytes: int = 256 * 1024 * 1024  # 256MB
+    image_fetch_timeout: float = 5.0  # seconds
+    image_fetch_concurrency: int = 8
+    
+    # Social account ids by (user, platform, handle)
+    social_account_cache_size: int = 10000
+    social_account_cache_ttl: int = 3600  # seconds
+    
+    # Public media kit lookups by username
+    media_kit_cache_size: int = 4096
+    media_kit_cache_ttl: int = 300  # seconds
+    media_kit_negative_ttl: int = 30  # seconds an unknown username stays cached
+    
+    # Media kit view tracking
+    view_flush_interval: float = 2.0  # seconds between bulk view writes
+    view_flush_batch_size: int = 500  # flush early once this many views are buffered
+    view_buffer_max: int = 50000  # views kept while the database is unreachable
+    view_spill_path: str = ""  # unflushed views saved at shutdown; must be persistent storage, unset loses them
+    
+    # Runtime metrics (/metrics is disabled unless a token is set)
+    metrics_token: str = ""
     
     # Rate Limiting
     rate_limit_requests: int = 100
     rate_limit_window: int = 60  # seconds
     
+    # Analysis statistics cache (keyed by like/comment counts)
+    analysis_cache_size: int = 1024
+    analysis_cache_ttl: int = 300  # seconds
+    
+    # Batch analysis
+    analysis_batch_max_posts: int = 200000  # posts across all accounts of one request
+    
+    # Analysis persistence (write-behind)
+    analysis_write_queue_size: int = 1000  # analyses waiting to be stored before /analyze waits
+    analysis_write_batch_size: int = 100  # rows per multi-row insert
+    analysis_write_interval: float = 0.5  # seconds to wait for a batch to fill
+    analysis_write_attempts: int = 4  # tries per batch (exponential backoff) before row-by-row
+    
+    # Engagement benchmarks
+    benchmark_min_samples: int = 100
+    benchmark_refresh_interval: int = 300  # seconds
+    
+    # Insight rule packs (optional directory of <platform>.json overrides)
+    insight_rules_dir: str = ""
+    
     # File Upload
     max_file_size: int = 5 * 1024 * 1024  # 5MB
     allowed_extensions: List[str] = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
@@ -1,17 +1,50 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
 from app.config import settings
+from app.services.pdf_cache import pdf_cache, RENDER_IRRELEVANT_FIELDS
+from app.services.kit_cache import public_kit_cache
+from app.utils.cache import TTLCache, MISSING
+from app.utils.pagination import Keyset
+from app.utils.postgrest import PostgrestClient
 import logging
+import threading
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+# Column projections for list endpoints; summaries leave out the bulky JSONB
+ANALYSIS_FIELDS = {
+    "summary": "id,social_account_id,engagement_rate,avg_likes,avg_comments,total_engagement,quality,created_at",
+    "full": "*"
+}
+MEDIA_KIT_FIELDS = {
+    "summary": "id,social_account_id,engagement_analysis_id,title,is_public,view_count,pdf_generated_at,created_at,updated_at",
+    "full": "*"
+}
+
+def _keyset_filter(after: Keyset) -> str:
+    """PostgREST `or` conditions for rows after (created_at, id) in newest-first order"""
+    # decode_cursor has already validated both values
+    created_at, row_id = after
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")'
+
 class SupabaseClient:
+    """
+    Lazily connected Supabase client
+    
+    Nothing is imported or connected until `connect()` (called from the
+    application lifespan) or the first `get_client()`.
+    """
+    
     def __init__(self):
-        self.client: Client = None
-        self.connect()
+        self.client: "Client" = None
+        self._lock = threading.Lock()
     
     def connect(self):
         """Initialize Supabase client"""
         try:
+            from supabase import create_client
             self.client = create_client(
                 settings.supabase_url,
                 settings.supabase_service_key
@@ -21,10 +54,12 @@ class SupabaseClient:
             logger.error(f"Failed to connect to Supabase: {e}")
             raise
     
-    def get_client(self) -> Client:
-        """Get Supabase client instance"""
+    def get_client(self) -> "Client":
+        """Get Supabase client instance, connecting on first use"""
         if not self.client:
-            self.connect()
+            with self._lock:
+                if not self.client:
+                    self.connect()
         return self.client
     
     async def health_check(self) -> bool:
@@ -37,18 +72,74 @@ class SupabaseClient:
             logger.error(f"Database health check failed: {e}")
             return False
 
-# Global database instance
+# Global database instance (connects on first use)
 db = SupabaseClient()
 
-def get_database() -> Client:
+def get_database() -> "Client":
     """Dependency to get database client"""
     return db.get_client()
 
+# (user_id, platform, handle) -> (social account id, followers last written)
+social_account_ids = TTLCache(maxsize=settings.social_account_cache_size, ttl=settings.social_account_cache_ttl)
+
+# Pooled async PostgREST client used by the default "postgrest" backend
+postgrest = PostgrestClient(
+    settings.supabase_url,
+    settings.supabase_service_key,
+    pool_size=settings.database_pool_size,
+    keepalive=settings.database_keepalive,
+    timeout=settings.database_timeout,
+    http2=settings.database_http2
+)
+
+async def database_health_check() -> bool:
+    """Health check against whichever backend serves requests"""
+    if settings.database_backend == "supabase":
+        return await db.health_check()
+    return await postgrest.health_check()
+
 # Database helper functions
 class DatabaseOperations:
-    def __init__(self, client: Client):
+    def __init__(self, client: "Client"):
         self.client = client
     
+    # Cache invalidation shared by every backend
+    def _media_kit_changed(self, kit_id: str, kit_data: dict, user_id: Optional[str] = None) -> None:
+        """Drop cached copies of a kit after an update"""
+        # Cached PDFs of the old content can no longer be requested
+        if set(kit_data) - RENDER_IRRELEVANT_FIELDS:
+            pdf_cache.invalidate_kit(kit_id)
+            public_kit_cache.invalidate_kit(kit_id)
+        if 'is_public' in kit_data:
+            self._media_kit_visibility_changed(user_id)
+    
+    def _media_kit_visibility_changed(self, user_id: Optional[str]) -> None:
+        """Drop public lookups a kit appearing or disappearing can change"""
+        # A kit going public may answer a cached miss; either way the owner's
+        # username may now resolve to a different kit (or none)
+        public_kit_cache.forget_missing()
+        if user_id:
+            public_kit_cache.invalidate_user(user_id)
+    
+    def _profile_changed(self, user_id: str, profile_data: dict) -> None:
+        """Drop cached public kits showing a profile (under its old and new username)"""
+        public_kit_cache.invalidate_user(user_id)
+        if profile_data.get('username'):
+            public_kit_cache.invalidate_username(profile_data['username'])
+    
+    async def get_media_kit_by_username(self, username: str):
+        """Get public media kit by username (read-through cached, including misses)"""
+        kit = public_kit_cache.get(username)
+        if kit is not MISSING:
+            return kit
+        try:
+            kit = await self._fetch_media_kit_by_username(username)
+        except Exception as e:
+            logger.error(f"Error fetching media kit for {username}: {e}")
+            return None
+        public_kit_cache.set(username, kit)
+        return kit
+    
     # Profile operations
     async def get_profile(self, user_id: str):
         """Get user profile by ID"""
@@ -72,6 +163,7 @@ class DatabaseOperations:
         """Update user profile"""
         try:
             result = self.client.table('profiles').update(profile_data).eq('id', user_id).execute()
+            self._profile_changed(user_id, profile_data)
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Error updating profile {user_id}: {e}")
@@ -87,6 +179,17 @@ class DatabaseOperations:
             logger.error(f"Error fetching social accounts for {user_id}: {e}")
             return []
     
+    async def get_social_account(self, user_id: str, platform: str, handle: str):
+        """Get a user's social account by platform and handle"""
+        try:
+            result = self.client.table('social_accounts').select('*').eq('user_id', user_id).eq(
+                'platform', platform
+            ).eq('handle', handle).limit(1).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Error fetching social account {platform}/@{handle}: {e}")
+            return None
+    
     async def create_social_account(self, account_data: dict):
         """Create new social account"""
         try:
@@ -96,6 +199,40 @@ class DatabaseOperations:
             logger.error(f"Error creating social account: {e}")
             raise
     
+    async def ensure_social_account(self, user_id: str, platform: str, handle: str, followers: int) -> str:
+        """
+        Id of the user's account for platform/handle, creating it if needed
+        
+        Upserts on the (user_id, platform, handle) unique key, so repeated or
+        concurrent calls share one row. Ids are cached in-process; the write is
+        skipped entirely unless the follower count changed.
+        """
+        key = (user_id, platform, handle)
+        cached = social_account_ids.get(key)
+        if cached is not MISSING and cached[1] == followers:
+            return cached[0]
+        
+        # Timestamps come from column defaults and the updated_at trigger
+        try:
+            account = await self._upsert_social_account({
+                "user_id": user_id,
+                "platform": platform,
+                "handle": handle,
+                "followers": followers,
+                "is_primary": True
+            })
+        except Exception as e:
+            logger.error(f"Error upserting social account {platform}/@{handle}: {e}")
+            raise
+        social_account_ids.set(key, (account["id"], followers))
+        return account["id"]
+    
+    async def _upsert_social_account(self, account_data: dict) -> dict:
+        result = self.client.table('social_accounts').upsert(
+            account_data, on_conflict='user_id,platform,handle'
+        ).execute()
+        return result.data[0]
+    
     # Engagement analysis operations
     async def create_engagement_analysis(self, analysis_data: dict):
         """Create new engagement analysis"""
@@ -106,6 +243,36 @@ class DatabaseOperations:
             logger.error(f"Error creating engagement analysis: {e}")
             raise
     
+    async def create_engagement_analyses(self, analyses: list):
+        """Create several engagement analyses with one multi-row insert"""
+        try:
+            result = self.client.table('engagement_analyses').insert(analyses).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error creating {len(analyses)} engagement analyses: {e}")
+            raise
+    
+    async def list_engagement_analyses(
+        self, user_id: str, limit: int, after: Optional[Keyset] = None, fields: str = "summary"
+    ):
+        """A user's analyses, newest first, starting after the `after` keyset"""
+        return await self._list_user_rows('engagement_analyses', ANALYSIS_FIELDS[fields], user_id, limit, after)
+    
+    async def _list_user_rows(self, table: str, columns: str, user_id: str, limit: int, after: Optional[Keyset]):
+        """One keyset page of a user's rows ordered by (created_at, id) descending"""
+        try:
+            query = self.client.table(table).select(columns).eq('user_id', user_id)
+            # The pinned postgrest-py has no .or_() and can't order by two
+            # columns in one parameter, so those are added directly
+            if after:
+                query.params = query.params.add('or', f"({_keyset_filter(after)})")
+            query.params = query.params.add('order', 'created_at.desc,id.desc')
+            result = query.limit(limit).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error listing {table} for user {user_id}: {e}")
+            raise
+    
     async def get_engagement_analysis(self, analysis_id: str):
         """Get engagement analysis by ID"""
         try:
@@ -115,27 +282,53 @@ class DatabaseOperations:
             logger.error(f"Error fetching engagement analysis {analysis_id}: {e}")
             return None
     
+    # Engagement aggregate operations
+    async def merge_engagement_aggregate(self, social_account_id: str, user_id: str, posts: list):
+        """Atomically fold posts newer than the stored high-water mark into the aggregate and return it"""
+        try:
+            result = self.client.rpc('merge_engagement_aggregate', {
+                'p_social_account_id': social_account_id,
+                'p_user_id': user_id,
+                'p_posts': posts
+            }).execute()
+            data = result.data
+            if isinstance(data, list):
+                data = data[0] if data else None
+            return data
+        except Exception as e:
+            logger.error(f"Error merging engagement aggregate for {social_account_id}: {e}")
+            raise
+    
+    # Engagement benchmark operations
+    async def get_engagement_benchmarks(self):
+        """Get all benchmark sketch buckets"""
+        try:
+            result = self.client.table('engagement_benchmarks').select(
+                'platform, follower_bucket, sketch_key, count'
+            ).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error fetching engagement benchmarks: {e}")
+            return []
+    
     # Media kit operations
     async def create_media_kit(self, kit_data: dict):
         """Create new media kit"""
         try:
             result = self.client.table('media_kits').insert(kit_data).execute()
+            self._media_kit_visibility_changed(kit_data.get('user_id'))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Error creating media kit: {e}")
             raise
     
-    async def get_media_kit_by_username(self, username: str):
-        """Get media kit by username"""
-        try:
-            # Join with profiles to get user info
-            result = self.client.table('media_kits').select(
-                '*, profiles!media_kits_user_id_fkey(username, full_name, avatar_url)'
-            ).eq('profiles.username', username).eq('is_public', True).single().execute()
-            return result.data if result.data else None
-        except Exception as e:
-            logger.error(f"Error fetching media kit for {username}: {e}")
-            return None
+    async def _fetch_media_kit_by_username(self, username: str):
+        """Query the public media kit for a username; None if there isn't exactly one"""
+        # Join with profiles to get user info
+        result = self.client.table('media_kits').select(
+            '*, profiles!media_kits_user_id_fkey(username, full_name, avatar_url)'
+        ).eq('profiles.username', username).eq('is_public', True).limit(2).execute()
+        return result.data[0] if result.data and len(result.data) == 1 else None
     
     async def get_media_kit(self, kit_id: str):
         """Get media kit by ID"""
@@ -146,11 +339,53 @@ class DatabaseOperations:
             logger.error(f"Error fetching media kit {kit_id}: {e}")
             return None
     
+    async def get_media_kits(self, kit_ids: list):
+        """Get several media kits by ID in one query"""
+        try:
+            result = self.client.table('media_kits').select('*').in_('id', kit_ids).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error fetching {len(kit_ids)} media kits: {e}")
+            return []
+    
+    async def get_user_media_kits(self, user_id: str):
+        """Get all media kits owned by a user"""
+        try:
+            result = self.client.table('media_kits').select('*').eq('user_id', user_id).order(
+                'created_at', desc=True
+            ).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error fetching media kits for user {user_id}: {e}")
+            return []
+    
+    async def list_media_kits(
+        self, user_id: str, limit: int, after: Optional[Keyset] = None, fields: str = "summary"
+    ):
+        """A user's media kits, newest first, starting after the `after` keyset"""
+        return await self._list_user_rows('media_kits', MEDIA_KIT_FIELDS[fields], user_id, limit, after)
+    
+    async def get_media_kit_bundles(self, kit_ids: list):
+        """Kits with their profile, social account and latest engagement analysis, in one query"""
+        try:
+            result = self.client.rpc('get_media_kit_bundles', {'p_kit_ids': kit_ids}).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error fetching bundles for {len(kit_ids)} media kits: {e}")
+            return []
+    
+    async def get_media_kit_bundle(self, kit_id: str):
+        """A kit's bundle (see get_media_kit_bundles), or None if it doesn't exist"""
+        bundles = await self.get_media_kit_bundles([kit_id])
+        return bundles[0] if bundles else None
+    
     async def update_media_kit(self, kit_id: str, kit_data: dict):
         """Update media kit"""
         try:
             result = self.client.table('media_kits').update(kit_data).eq('id', kit_id).execute()
-            return result.data[0] if result.data else None
+            kit = result.data[0] if result.data else None
+            self._media_kit_changed(kit_id, kit_data, (kit or {}).get('user_id'))
+            return kit
         except Exception as e:
             logger.error(f"Error updating media kit {kit_id}: {e}")
             raise
@@ -159,20 +394,236 @@ class DatabaseOperations:
     async def track_media_kit_view(self, kit_id: str, viewer_data: dict):
         """Track media kit view"""
         try:
-            # Insert view record
-            view_data = {
-                'media_kit_id': kit_id,
-                **viewer_data
-            }
-            result = self.client.table('media_kit_views').insert(view_data).execute()
-            
-            # Get updated view count
-            kit_result = self.client.table('media_kits').select('view_count').eq('id', kit_id).single().execute()
-            return kit_result.data['view_count'] if kit_result.data else 0
+            counts = await self.record_media_kit_views([{'media_kit_id': kit_id, **viewer_data}])
+            return counts.get(kit_id, 0)
         except Exception as e:
             logger.error(f"Error tracking view for media kit {kit_id}: {e}")
             return 0
+    
+    async def record_media_kit_views(self, views: list):
+        """Insert a batch of views, incrementing each kit once; returns kit id -> view count"""
+        try:
+            result = self.client.rpc('record_media_kit_views', {'p_views': views}).execute()
+            return {row['media_kit_id']: row['view_count'] for row in result.data or []}
+        except Exception as e:
+            logger.error(f"Error recording {len(views)} media kit views: {e}")
+            raise
+
+class PostgrestDatabaseOperations(DatabaseOperations):
+    """
+    DatabaseOperations over the async PostgREST pool
+    
+    Same methods and error handling as the supabase-backed version, but every
+    query is awaited on a pooled connection instead of blocking the event loop.
+    """
+    
+    def __init__(self, client: PostgrestClient):
+        self.client = client
+    
+    # Profile operations
+    async def get_profile(self, user_id: str):
+        """Get user profile by ID"""
+        try:
+            return await self.client.select('profiles', filters=[('id', 'eq', user_id)], single=True)
+        except Exception as e:
+            logger.error(f"Error fetching profile {user_id}: {e}")
+            return None
+    
+    async def create_profile(self, profile_data: dict):
+        """Create new user profile"""
+        try:
+            rows = await self.client.insert('profiles', profile_data)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error creating profile: {e}")
+            raise
+    
+    async def update_profile(self, user_id: str, profile_data: dict):
+        """Update user profile"""
+        try:
+            rows = await self.client.update('profiles', profile_data, [('id', 'eq', user_id)])
+            self._profile_changed(user_id, profile_data)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error updating profile {user_id}: {e}")
+            raise
+    
+    # Social accounts operations
+    async def get_social_accounts(self, user_id: str):
+        """Get user's social accounts"""
+        try:
+            return await self.client.select('social_accounts', filters=[('user_id', 'eq', user_id)]) or []
+        except Exception as e:
+            logger.error(f"Error fetching social accounts for {user_id}: {e}")
+            return []
+    
+    async def get_social_account(self, user_id: str, platform: str, handle: str):
+        """Get a user's social account by platform and handle"""
+        try:
+            rows = await self.client.select('social_accounts', filters=[
+                ('user_id', 'eq', user_id), ('platform', 'eq', platform), ('handle', 'eq', handle)
+            ], limit=1)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error fetching social account {platform}/@{handle}: {e}")
+            return None
+    
+    async def create_social_account(self, account_data: dict):
+        """Create new social account"""
+        try:
+            rows = await self.client.insert('social_accounts', account_data)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error creating social account: {e}")
+            raise
+    
+    async def _upsert_social_account(self, account_data: dict) -> dict:
+        rows = await self.client.upsert('social_accounts', account_data, on_conflict='user_id,platform,handle')
+        return rows[0]
+    
+    # Engagement analysis operations
+    async def create_engagement_analysis(self, analysis_data: dict):
+        """Create new engagement analysis"""
+        try:
+            rows = await self.client.insert('engagement_analyses', analysis_data)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error creating engagement analysis: {e}")
+            raise
+    
+    async def create_engagement_analyses(self, analyses: list):
+        """Create several engagement analyses with one multi-row insert"""
+        try:
+            return await self.client.insert('engagement_analyses', analyses) or []
+        except Exception as e:
+            logger.error(f"Error creating {len(analyses)} engagement analyses: {e}")
+            raise
+    
+    async def _list_user_rows(self, table: str, columns: str, user_id: str, limit: int, after: Optional[Keyset]):
+        """One keyset page of a user's rows ordered by (created_at, id) descending"""
+        try:
+            return await self.client.select(
+                table, columns, filters=[('user_id', 'eq', user_id)],
+                any_of=_keyset_filter(after) if after else None,
+                order='created_at,id', desc=True, limit=limit
+            ) or []
+        except Exception as e:
+            logger.error(f"Error listing {table} for user {user_id}: {e}")
+            raise
+    
+    async def get_engagement_analysis(self, analysis_id: str):
+        """Get engagement analysis by ID"""
+        try:
+            return await self.client.select('engagement_analyses', filters=[('id', 'eq', analysis_id)], single=True)
+        except Exception as e:
+            logger.error(f"Error fetching engagement analysis {analysis_id}: {e}")
+            return None
+    
+    # Engagement aggregate operations
+    async def merge_engagement_aggregate(self, social_account_id: str, user_id: str, posts: list):
+        """Atomically fold posts newer than the stored high-water mark into the aggregate and return it"""
+        try:
+            data = await self.client.rpc('merge_engagement_aggregate', {
+                'p_social_account_id': social_account_id,
+                'p_user_id': user_id,
+                'p_posts': posts
+            })
+            if isinstance(data, list):
+                data = data[0] if data else None
+            return data
+        except Exception as e:
+            logger.error(f"Error merging engagement aggregate for {social_account_id}: {e}")
+            raise
+    
+    # Engagement benchmark operations
+    async def get_engagement_benchmarks(self):
+        """Get all benchmark sketch buckets"""
+        try:
+            return await self.client.select(
+                'engagement_benchmarks', 'platform,follower_bucket,sketch_key,count'
+            ) or []
+        except Exception as e:
+            logger.error(f"Error fetching engagement benchmarks: {e}")
+            return []
+    
+    # Media kit operations
+    async def create_media_kit(self, kit_data: dict):
+        """Create new media kit"""
+        try:
+            rows = await self.client.insert('media_kits', kit_data)
+            self._media_kit_visibility_changed(kit_data.get('user_id'))
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error creating media kit: {e}")
+            raise
+    
+    async def _fetch_media_kit_by_username(self, username: str):
+        """Query the public media kit for a username; None if there isn't exactly one"""
+        # Join with profiles to get user info
+        return await self.client.select(
+            'media_kits',
+            '*,profiles!media_kits_user_id_fkey(username,full_name,avatar_url)',
+            filters=[('profiles.username', 'eq', username), ('is_public', 'eq', True)],
+            single=True
+        )
+    
+    async def get_media_kit(self, kit_id: str):
+        """Get media kit by ID"""
+        try:
+            return await self.client.select('media_kits', filters=[('id', 'eq', kit_id)], single=True)
+        except Exception as e:
+            logger.error(f"Error fetching media kit {kit_id}: {e}")
+            return None
+    
+    async def get_media_kits(self, kit_ids: list):
+        """Get several media kits by ID in one query"""
+        try:
+            return await self.client.select('media_kits', filters=[('id', 'in', kit_ids)]) or []
+        except Exception as e:
+            logger.error(f"Error fetching {len(kit_ids)} media kits: {e}")
+            return []
+    
+    async def get_user_media_kits(self, user_id: str):
+        """Get all media kits owned by a user"""
+        try:
+            return await self.client.select(
+                'media_kits', filters=[('user_id', 'eq', user_id)], order='created_at', desc=True
+            ) or []
+        except Exception as e:
+            logger.error(f"Error fetching media kits for user {user_id}: {e}")
+            return []
+    
+    async def get_media_kit_bundles(self, kit_ids: list):
+        """Kits with their profile, social account and latest engagement analysis, in one query"""
+        try:
+            return await self.client.rpc('get_media_kit_bundles', {'p_kit_ids': kit_ids}) or []
+        except Exception as e:
+            logger.error(f"Error fetching bundles for {len(kit_ids)} media kits: {e}")
+            return []
+    
+    async def update_media_kit(self, kit_id: str, kit_data: dict):
+        """Update media kit"""
+        try:
+            rows = await self.client.update('media_kits', kit_data, [('id', 'eq', kit_id)])
+            kit = rows[0] if rows else None
+            self._media_kit_changed(kit_id, kit_data, (kit or {}).get('user_id'))
+            return kit
+        except Exception as e:
+            logger.error(f"Error updating media kit {kit_id}: {e}")
+            raise
+    
+    # Media kit views operations (track_media_kit_view is inherited)
+    async def record_media_kit_views(self, views: list):
+        """Insert a batch of views, incrementing each kit once; returns kit id -> view count"""
+        try:
+            rows = await self.client.rpc('record_media_kit_views', {'p_views': views})
+            return {row['media_kit_id']: row['view_count'] for row in rows or []}
+        except Exception as e:
+            logger.error(f"Error recording {len(views)} media kit views: {e}")
+            raise
 
 def get_db_operations() -> DatabaseOperations:
-    """Get database operations instance"""
-    return DatabaseOperations(get_database())
+    """Get database operations instance for the configured backend"""
+    if settings.database_backend == "supabase":
+        return DatabaseOperations(get_database())
+    return PostgrestDatabaseOperations(postgrest)
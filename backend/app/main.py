@@ -1,20 +1,40 @@
-from fastapi import FastAPI, HTTPException, status
+# Time module imports from here on for the startup report
+from app.utils.startup import import_timer
+import_timer.start()
+
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import contextlib
 import logging
+import secrets
 import sys
 from datetime import datetime
+from typing import Optional
 
 # Import configuration and database
 from app.config import settings
-from app.database import db
+from app.database import db, postgrest, database_health_check, get_db_operations
+from app.models.media_kit import Platform
+from app.services.engagement import analysis_cache, EngagementAnalyzer
+from app.services.benchmarks import benchmark_index, refresh_benchmarks_periodically
+from app.services.pdf_renderer import pdf_render_pool
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_jobs import pdf_job_queue
+from app.services.preview import preview_cache
+from app.services.view_buffer import view_buffer
+from app.services.kit_cache import public_kit_cache
+from app.services.analysis_writer import analysis_writer
 
 # Import routes
 from app.routes.analyzer import router as analyzer_router
 from app.routes.media_kit import router as media_kit_router
 
+import_timer.stop()
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO if not settings.debug else logging.DEBUG,
@@ -31,10 +51,13 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting Ifluencesa API...")
+    logger.info(import_timer.summary())
     
-    # Test database connection
+    # Connect (supabase is imported here, not when the app module loads) and test
     try:
-        health = await db.health_check()
+        if settings.database_backend == "supabase":
+            await asyncio.get_running_loop().run_in_executor(None, db.get_client)
+        health = await database_health_check()
         if health:
             logger.info("Database connection established")
         else:
@@ -42,10 +65,36 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
     
+    # Index PDFs cached on disk by earlier processes
+    await asyncio.get_running_loop().run_in_executor(None, pdf_cache.load)
+    
+    # Start PDF workers so the first download skips template/font setup
+    try:
+        await pdf_render_pool.start()
+    except Exception as e:
+        logger.error(f"PDF render pool warm-up failed: {e}")
+    
+    # Load engagement benchmarks and keep them in sync with other workers
+    benchmark_task = asyncio.create_task(refresh_benchmarks_periodically(
+        get_db_operations(), settings.benchmark_refresh_interval
+    ))
+    
+    # Flush buffered media kit views and store analyses in the background
+    view_buffer.start(get_db_operations())
+    analysis_writer.start(get_db_operations())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Ifluencesa API...")
+    benchmark_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await benchmark_task
+    pdf_job_queue.shutdown()
+    pdf_render_pool.shutdown()
+    await view_buffer.close()
+    await analysis_writer.close()
+    await postgrest.aclose()
 
 # Create FastAPI application
 app = FastAPI(
@@ -94,7 +143,7 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        db_healthy = await db.health_check()
+        db_healthy = await database_health_check()
         
         return {
             "status": "healthy" if db_healthy else "degraded",
@@ -114,6 +163,30 @@ async def health_check():
             }
         )
 
+# Runtime metrics endpoint
+@app.get("/metrics")
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """In-process cache and queue metrics (requires METRICS_TOKEN)"""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.metrics_token}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": {"backend": settings.database_backend, **postgrest.stats()},
+        "analysis_cache": analysis_cache.stats(),
+        "benchmark_samples": benchmark_index.stats(),
+        "pdf_render_pool": pdf_render_pool.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "pdf_jobs": pdf_job_queue.stats(),
+        "preview_cache": preview_cache.stats(),
+        "public_kit_cache": public_kit_cache.stats(),
+        "view_buffer": view_buffer.stats(),
+        "analysis_writer": analysis_writer.stats(),
+        "startup": import_timer.report()
+    }
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -134,27 +207,29 @@ app.include_router(media_kit_router)
 @app.get("/api/v1/platforms")
 async def get_supported_platforms():
     """Get list of supported social media platforms"""
+    # Same averages the analyzer grades against (live once benchmarks fill)
+    analyzer = EngagementAnalyzer()
     return {
         "platforms": [
             {
                 "id": "instagram",
                 "name": "Instagram",
                 "icon": "📷",
-                "avg_engagement_rate": 2.5,
+                "avg_engagement_rate": round(analyzer.industry_average(Platform.INSTAGRAM), 2),
                 "handle_format": "@username"
             },
             {
                 "id": "tiktok", 
                 "name": "TikTok",
                 "icon": "🎵",
-                "avg_engagement_rate": 5.3,
+                "avg_engagement_rate": round(analyzer.industry_average(Platform.TIKTOK), 2),
                 "handle_format": "@username"
             },
             {
                 "id": "youtube",
                 "name": "YouTube", 
                 "icon": "📺",
-                "avg_engagement_rate": 1.8,
+                "avg_engagement_rate": round(analyzer.industry_average(Platform.YOUTUBE), 2),
                 "handle_format": "@channelname"
             }
         ]
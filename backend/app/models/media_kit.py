@@ -21,7 +21,7 @@ class EngagementAnalysisRequest(BaseModel):
     platform: Platform
     handle: str = Field(..., min_length=1, max_length=50)
     followers: int = Field(..., ge=1)
-    posts: List[PostData] = Field(..., min_items=1, max_items=10)
+    posts: List[PostData] = Field(..., min_items=1, max_items=50000)
 
 class EngagementAnalysisResponse(BaseModel):
     engagement_rate: float = Field(..., ge=0, le=100)
@@ -29,9 +29,57 @@ class EngagementAnalysisResponse(BaseModel):
     avg_comments: int = Field(..., ge=0)
     total_engagement: int = Field(..., ge=0)
     engagement_quality: EngagementQuality
+    engagement_percentile: Optional[float] = Field(None, ge=0, le=100)  # vs. same platform/follower tier
     insights: List[str] = Field(..., max_items=5)
     best_post: Optional[PostData] = None
 
+class BatchAccountRequest(EngagementAnalysisRequest):
+    # Share of the account's profile that is filled in; batch accounts have no
+    # stored profile, so the caller supplies it (default as /brand-readiness-score)
+    profile_completeness: float = Field(0.8, ge=0, le=1)
+
+class BatchEngagementAnalysisRequest(BaseModel):
+    accounts: List[BatchAccountRequest] = Field(..., min_items=1, max_items=1000)
+
+class BatchEngagementResult(BaseModel):
+    platform: Platform
+    handle: str
+    engagement_analysis: Optional[EngagementAnalysisResponse] = None
+    brand_readiness: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None  # Set instead of the results when the account can't be scored
+
+class BatchEngagementAnalysisResponse(BaseModel):
+    results: List[BatchEngagementResult]
+
+class RollingEngagementPoint(BaseModel):
+    date: datetime
+    engagement_rate: float
+    posts_in_window: int
+
+class PostingCadence(BaseModel):
+    posts_per_week: float
+    median_interval_hours: Optional[float] = None
+    longest_gap_days: Optional[float] = None
+    active_days: float
+
+class SlotPerformance(BaseModel):
+    slot: int  # 0=Monday..6=Sunday for weekdays, 0-23 UTC for hours
+    posts: int
+    avg_engagement_rate: float
+
+class EngagementTrend(BaseModel):
+    slope_per_day: float  # engagement-rate points per day
+    change_per_30_days: float
+    direction: str  # growing, stable or declining
+
+class EngagementTimeSeriesResponse(BaseModel):
+    window_days: int
+    rolling: List[RollingEngagementPoint]
+    cadence: PostingCadence
+    day_of_week: List[SlotPerformance]
+    hour_of_day: List[SlotPerformance]
+    trend: EngagementTrend
+
 class TopPost(BaseModel):
     likes: int = Field(..., ge=0)
     comments: int = Field(..., ge=0)
@@ -76,6 +124,23 @@ class MediaKitViewResponse(BaseModel):
     view_count: int
     timestamp: datetime
 
+class MediaKitExportRequest(BaseModel):
+    kit_ids: List[str] = Field(default_factory=list, max_items=500)
+    all_kits: bool = False  # Export every kit owned by the caller instead
+
+class PDFJobStatus(BaseModel):
+    job_id: str
+    kit_id: str
+    status: str = Field(..., pattern="^(pending|running|done|failed)$")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    pdf_url: str
+
+class ListPage(BaseModel):
+    items: List[Dict[str, Any]]  # Rows with the requested field projection
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; null on the last
+
 class EngagementAnalysis(BaseModel):
     id: str
     user_id: str
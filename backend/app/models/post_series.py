@@ -0,0 +1,116 @@
+from typing import List, Dict, Any, Optional, Iterable
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from .media_kit import PostData
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _to_epoch_us(value: datetime) -> int:
+    """Convert a datetime to UTC microseconds since epoch (naive = UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def _parse_datetime(value: Any) -> datetime:
+    """Parse a stored post_date (datetime or ISO 8601 string)"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+class PostSeries:
+    """
+    Compact columnar representation of a creator's post history
+    
+    Likes, comments and post timestamps are kept as NumPy arrays, while
+    captions and image URLs are stored sparsely and only turned back into
+    PostData objects when a single post needs to leave the service layer.
+    """
+    
+    __slots__ = ("likes", "comments", "timestamps", "_captions", "_image_urls")
+    
+    def __init__(
+        self,
+        likes: np.ndarray,
+        comments: np.ndarray,
+        timestamps: np.ndarray,
+        captions: Optional[Dict[int, str]] = None,
+        image_urls: Optional[Dict[int, str]] = None
+    ):
+        self.likes = np.asarray(likes, dtype=np.int64)
+        self.comments = np.asarray(comments, dtype=np.int64)
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        self._captions = captions or {}
+        self._image_urls = image_urls or {}
+        
+        if not (len(self.likes) == len(self.comments) == len(self.timestamps)):
+            raise ValueError("PostSeries columns must have the same length")
+    
+    @classmethod
+    def from_posts(cls, posts: List[PostData]) -> "PostSeries":
+        """Build a series from validated request posts (API boundary)"""
+        count = len(posts)
+        return cls(
+            likes=np.fromiter((p.likes for p in posts), dtype=np.int64, count=count),
+            comments=np.fromiter((p.comments for p in posts), dtype=np.int64, count=count),
+            timestamps=np.fromiter(
+                (_to_epoch_us(p.post_date) for p in posts), dtype=np.int64, count=count
+            ).astype("datetime64[us]"),
+            captions={i: p.caption for i, p in enumerate(posts) if p.caption is not None},
+            image_urls={i: p.image_url for i, p in enumerate(posts) if p.image_url is not None}
+        )
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "PostSeries":
+        """Build a series from stored post_data JSON without pydantic"""
+        records = list(records)
+        count = len(records)
+        return cls(
+            likes=np.fromiter((int(r["likes"]) for r in records), dtype=np.int64, count=count),
+            comments=np.fromiter((int(r["comments"]) for r in records), dtype=np.int64, count=count),
+            timestamps=np.fromiter(
+                (_to_epoch_us(_parse_datetime(r["post_date"])) for r in records),
+                dtype=np.int64, count=count
+            ).astype("datetime64[us]"),
+            captions={i: r["caption"] for i, r in enumerate(records) if r.get("caption") is not None},
+            image_urls={i: r["image_url"] for i, r in enumerate(records) if r.get("image_url") is not None}
+        )
+    
+    def __len__(self) -> int:
+        return len(self.likes)
+    
+    @property
+    def engagement(self) -> np.ndarray:
+        """Per-post likes + comments"""
+        return self.likes + self.comments
+    
+    def post_date(self, index: int) -> datetime:
+        """Post timestamp as a timezone-aware UTC datetime"""
+        micros = int(self.timestamps[index].astype(np.int64))
+        return _EPOCH + timedelta(microseconds=micros)
+    
+    def post(self, index: int) -> PostData:
+        """Materialize a single post as PostData"""
+        return PostData(
+            likes=int(self.likes[index]),
+            comments=int(self.comments[index]),
+            post_date=self.post_date(index),
+            caption=self._captions.get(index),
+            image_url=self._image_urls.get(index)
+        )
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Serialize to JSON-ready dicts for the post_data column"""
+        dates = np.datetime_as_string(self.timestamps, unit="us", timezone="UTC")
+        records = []
+        for i, (likes, comments, post_date) in enumerate(
+            zip(self.likes.tolist(), self.comments.tolist(), dates.tolist())
+        ):
+            records.append({
+                "likes": likes,
+                "comments": comments,
+                "post_date": post_date,
+                "image_url": self._image_urls.get(i),
+                "caption": self._captions.get(i)
+            })
+        return records
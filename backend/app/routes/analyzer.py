@@ -1,12 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.models.media_kit import EngagementAnalysisRequest, EngagementAnalysisResponse
-from app.services.engagement import EngagementAnalyzer
+from app.models.media_kit import (
+    EngagementAnalysisRequest,
+    EngagementAnalysisResponse,
+    BatchEngagementAnalysisRequest,
+    BatchEngagementAnalysisResponse,
+    BatchEngagementResult,
+    EngagementTimeSeriesResponse,
+    ListPage
+)
+from app.models.post_series import PostSeries
+from app.services.engagement import EngagementAnalyzer, EngagementStats
+from app.services.timeseries import EngagementTimeSeriesAnalyzer
+from app.services.benchmarks import benchmark_index
+from app.services.analysis_writer import analysis_writer
 from app.database import get_db_operations, DatabaseOperations
+from app.config import settings
 from app.utils.auth import verify_token
+from app.utils.pagination import decode_cursor, paginate, InvalidCursor
 import logging
 import uuid
 from datetime import datetime
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1", tags=["engagement-analysis"])
@@ -38,42 +53,31 @@ async def analyze_engagement(
         # Initialize engagement analyzer
         analyzer = EngagementAnalyzer()
         
-        # Perform analysis
-        analysis_result = analyzer.analyze_engagement(request)
+        # Perform analysis (memoized for identical payloads)
+        analysis_result = analyzer.analyze_engagement_cached(request)
         
-        # Store analysis in database
+        # Store analysis in database (write-behind; the response doesn't wait)
         try:
-            # First, create or get social account
-            social_account_data = {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "platform": request.platform.value,
-                "handle": request.handle,
-                "followers": request.followers,
-                "is_primary": True,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            
-            social_account = await db_ops.create_social_account(social_account_data)
-            
-            # Store engagement analysis
             analysis_data = {
                 "id": str(uuid.uuid4()),
                 "user_id": user_id,
-                "social_account_id": social_account["id"],
                 "engagement_rate": analysis_result.engagement_rate,
                 "avg_likes": analysis_result.avg_likes,
                 "avg_comments": analysis_result.avg_comments,
                 "total_engagement": analysis_result.total_engagement,
                 "quality": analysis_result.engagement_quality.value,
                 "insights": analysis_result.insights,
-                "post_data": [post.dict() for post in request.posts],
+                "post_data": PostSeries.from_posts(request.posts).to_records(),
                 "best_post": analysis_result.best_post.dict() if analysis_result.best_post else None,
                 "created_at": datetime.utcnow().isoformat()
             }
             
-            await db_ops.create_engagement_analysis(analysis_data)
+            await analysis_writer.submit(
+                db_ops, (user_id, request.platform.value, request.handle, request.followers), analysis_data
+            )
+            
+            # Mirror the benchmark trigger in this process's sketches
+            benchmark_index.record(request.platform, request.followers, analysis_result.engagement_rate)
             
         except Exception as db_error:
             logger.warning(f"Failed to store analysis in database: {db_error}")
@@ -91,6 +95,135 @@ async def analyze_engagement(
             detail="Failed to analyze engagement data"
         )
 
+@router.post("/analyze/batch", response_model=BatchEngagementAnalysisResponse)
+async def analyze_engagement_batch(
+    request: BatchEngagementAnalysisRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Analyze engagement and brand readiness for many accounts in one call
+    
+    Intended for agency-scale scoring jobs. Results match the single-account
+    /analyze and /brand-readiness-score endpoints but are not stored.
+    """
+    try:
+        # Verify authentication
+        verify_token(credentials.credentials)
+        
+        total_posts = sum(len(account.posts) for account in request.accounts)
+        if total_posts > settings.analysis_batch_max_posts:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.analysis_batch_max_posts} posts per batch (got {total_posts})"
+            )
+        
+        analyzer = EngagementAnalyzer()
+        batch_results = analyzer.analyze_engagement_batch(request.accounts)
+        
+        return BatchEngagementAnalysisResponse(
+            results=[
+                BatchEngagementResult(
+                    platform=account.platform,
+                    handle=account.handle,
+                    **result
+                )
+                for account, result in zip(request.accounts, batch_results)
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch engagement analysis failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze engagement data"
+        )
+
+@router.post("/analyze/incremental", response_model=EngagementAnalysisResponse)
+async def analyze_engagement_incremental(
+    request: EngagementAnalysisRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db_ops: DatabaseOperations = Depends(get_db_operations)
+):
+    """
+    Fold newly seen posts into the account's stored engagement aggregate
+    
+    The aggregate remembers the newest post_date merged so far, and posts at
+    or before it are skipped, so retries and overlapping submissions are
+    never counted twice (post history must therefore be submitted oldest
+    first). The response matches what /analyze would return for the full
+    history, but the cost is proportional to the new posts only.
+    """
+    try:
+        # Verify authentication token
+        user_data = verify_token(credentials.credentials)
+        user_id = user_data.get("sub")
+        
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication token"
+            )
+        
+        # Get or create the social account the aggregate belongs to
+        social_account_id = await db_ops.ensure_social_account(
+            user_id, request.platform.value, request.handle, request.followers
+        )
+        
+        # Merge atomically in the database (skipping posts already merged)
+        # and analyze the merged aggregate
+        aggregate = await db_ops.merge_engagement_aggregate(
+            social_account_id, user_id, PostSeries.from_posts(request.posts).to_records()
+        )
+        stats = EngagementStats.from_aggregate(aggregate) if aggregate else EngagementStats().update(request.posts)
+        
+        analyzer = EngagementAnalyzer()
+        analysis_result = analyzer.analyze_stats(stats, request.followers, request.platform)
+        
+        logger.info(
+            f"Incremental analysis of {len(request.posts)} submitted posts for user {user_id}, "
+            f"handle @{request.handle} ({stats.count} merged in total)"
+        )
+        return analysis_result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Incremental engagement analysis failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze engagement data"
+        )
+
+@router.post("/analyze/timeseries", response_model=EngagementTimeSeriesResponse)
+async def analyze_engagement_timeseries(
+    request: EngagementAnalysisRequest,
+    window_days: int = Query(30, ge=1, le=365),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Analyze engagement over time using post dates
+    
+    Returns a rolling-window engagement rate, posting cadence, weekday and
+    hour-of-day performance (UTC) and a fitted trend slope.
+    """
+    try:
+        # Verify authentication
+        verify_token(credentials.credentials)
+        
+        analyzer = EngagementTimeSeriesAnalyzer(window_days=window_days)
+        return analyzer.analyze(PostSeries.from_posts(request.posts), request.followers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Time-series engagement analysis failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze engagement data"
+        )
+
 @router.get("/analyze/{analysis_id}")
 async def get_analysis(
     analysis_id: str,
@@ -130,6 +263,53 @@ async def get_analysis(
             detail="Failed to fetch analysis"
         )
 
+@router.get("/analyses", response_model=ListPage)
+async def list_analyses(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: str = Query("summary", pattern="^(summary|full)$"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db_ops: DatabaseOperations = Depends(get_db_operations)
+):
+    """
+    List the caller's stored analyses, newest first
+    
+    Pages are keyset-paginated: pass `next_cursor` back as `cursor` for the
+    next page. `summary` omits the stored posts; `full` returns whole rows.
+    """
+    try:
+        # Verify authentication
+        user_data = verify_token(credentials.credentials)
+        user_id = user_data.get("sub")
+        
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication token"
+            )
+        
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        
+        # One extra row tells us whether there is a next page
+        rows = await db_ops.list_engagement_analyses(user_id, limit + 1, after, fields)
+        items, next_cursor = paginate(rows, limit)
+        return ListPage(items=items, next_cursor=next_cursor)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to list analyses: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list analyses"
+        )
+
 @router.post("/brand-readiness-score")
 async def calculate_brand_readiness(
     request: EngagementAnalysisRequest,
@@ -143,8 +323,8 @@ async def calculate_brand_readiness(
         # Initialize analyzer
         analyzer = EngagementAnalyzer()
         
-        # Perform basic analysis first
-        analysis_result = analyzer.analyze_engagement(request)
+        # Perform basic analysis first (shared cache with /analyze)
+        analysis_result = analyzer.analyze_engagement_cached(request)
         
         # Calculate brand readiness score
         readiness_score = analyzer.calculate_brand_readiness_score(
@@ -1,25 +1,153 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Response
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from app.models.media_kit import (
     MediaKitRequest, 
     MediaKitResponse, 
     MediaKitPublic,
-    MediaKitViewResponse
+    MediaKitViewResponse,
+    MediaKitExportRequest,
+    PDFJobStatus,
+    ListPage
 )
-from app.services.pdf_generator import get_pdf_generator
+from app.services.pdf_cache import pdf_cache, pdf_cache_key
+from app.services.pdf_jobs import pdf_job_queue, PDFJob, JobQueueFull
+from app.services.pdf_renderer import pdf_render_pool
+from app.services.pdf_export import stream_zip, as_completed_bounded
+from app.services.preview import preview_renderer
+from app.services.view_buffer import view_buffer
+from app.config import settings
+from app.services.pdf_generator import template_fingerprint
 from app.database import get_db_operations, DatabaseOperations
 from app.utils.auth import verify_token
+from app.utils.pagination import decode_cursor, paginate, InvalidCursor
+from app.utils.streaming import parse_byte_range, iter_file_range, RangeNotSatisfiable
+import asyncio
 import logging
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple, BinaryIO, Set
 import io
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1", tags=["media-kit"])
 security = HTTPBearer()
 
+# Fire-and-forget database writes, referenced until they finish
+_background_writes: Set[asyncio.Task] = set()
+
+def _write_in_background(coro, description: str) -> None:
+    """Run database work without making anyone wait for it"""
+    def done(task: asyncio.Task):
+        _background_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background write failed ({description}): {task.exception()}")
+    
+    task = asyncio.create_task(coro)
+    _background_writes.add(task)
+    task.add_done_callback(done)
+
+def _pdf_render_data(
+    media_kit: dict,
+    profile: dict,
+    social_account: Optional[dict] = None,
+    analysis: Optional[dict] = None
+) -> dict:
+    """Template inputs for a media kit PDF (account and analysis figures take precedence)"""
+    account = social_account or {}
+    analysis = analysis or {}
+    return {
+        "username": profile.get("username", "creator"),
+        "full_name": profile.get("full_name"),
+        "handle": account.get("handle") or media_kit.get("handle", ""),
+        "platform": account.get("platform") or media_kit.get("platform", "instagram"),
+        "followers": account.get("followers", media_kit.get("followers", 0)),
+        "engagement_rate": analysis.get("engagement_rate", media_kit.get("engagement_rate", 0)),
+        "avg_likes": analysis.get("avg_likes", media_kit.get("avg_likes", 0)),
+        "avg_comments": analysis.get("avg_comments", media_kit.get("avg_comments", 0)),
+        "engagement_quality": analysis.get("quality") or "good",
+        "bio": media_kit.get("bio", "Content creator and influencer"),
+        "top_posts": media_kit.get("top_posts", []),
+        "contact_email": media_kit.get("contact_info", {}).get("email", ""),
+        "avatar_url": profile.get("avatar_url"),
+        "insights": analysis.get("insights") or []
+    }
+
+def _bundle_render_data(bundle: dict) -> dict:
+    """Template inputs from a get_media_kit_bundles row"""
+    return _pdf_render_data(
+        bundle["media_kit"],
+        bundle.get("profile") or {},
+        bundle.get("social_account"),
+        bundle.get("engagement_analysis")
+    )
+
+def _enqueue_pdf_render(db_ops: DatabaseOperations, media_kit: dict, pdf_data: dict, cache_key: str) -> PDFJob:
+    """Queue a background render that fills the PDF cache"""
+    async def mark_generated(job: PDFJob):
+        # Bookkeeping only; the job (and anyone waiting on it) needn't wait
+        _write_in_background(
+            db_ops.update_media_kit(job.kit_id, {"pdf_generated_at": datetime.utcnow().isoformat()}),
+            f"pdf_generated_at for kit {job.kit_id}"
+        )
+    
+    return pdf_job_queue.enqueue(
+        media_kit["id"],
+        media_kit.get("user_id"),
+        bool(media_kit.get("is_public")),
+        cache_key,
+        dict(pdf_data),
+        on_complete=mark_generated
+    )
+
+async def _open_kit_pdf(db_ops: DatabaseOperations, bundle: dict) -> Tuple[BinaryIO, int]:
+    """Open a kit's PDF (file object, size), rendering it via the job queue if needed"""
+    media_kit = bundle["media_kit"]
+    pdf_data = _bundle_render_data(bundle)
+    cache_key = pdf_cache_key(media_kit["id"], pdf_data, template_fingerprint())
+    cached = pdf_cache.open(cache_key)
+    if cached is None:
+        job = await pdf_job_queue.wait(_enqueue_pdf_render(db_ops, media_kit, pdf_data, cache_key))
+        if job.status != "done":
+            raise RuntimeError(job.error or "Rendering failed")
+        cached = pdf_cache.open(cache_key)
+        if cached is None:
+            # Evicted straight away (e.g. larger than the cache); render directly
+            pdf_bytes = await pdf_render_pool.render(dict(pdf_data), deterministic=True)
+            cached = io.BytesIO(pdf_bytes), len(pdf_bytes)
+    return cached
+
+async def _prerender_pdf(db_ops: DatabaseOperations, kit_id: str) -> None:
+    """Queue a render of what downloads will ask for (including the latest analysis)"""
+    bundle = await db_ops.get_media_kit_bundle(kit_id)
+    if bundle:
+        pdf_data = _bundle_render_data(bundle)
+        _enqueue_pdf_render(
+            db_ops, bundle["media_kit"], pdf_data,
+            pdf_cache_key(kit_id, pdf_data, template_fingerprint())
+        )
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag`"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]
+
+def _pdf_job_status(job: PDFJob) -> PDFJobStatus:
+    return PDFJobStatus(
+        job_id=job.id,
+        kit_id=job.kit_id,
+        status=job.status,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        pdf_url=f"/api/v1/media-kit/{job.kit_id}/pdf"
+    )
+
 @router.post("/media-kit", response_model=MediaKitResponse)
 async def create_media_kit(
     request: MediaKitRequest,
@@ -55,25 +183,16 @@ async def create_media_kit(
             }
             profile = await db_ops.create_profile(profile_data)
         
-        # Create or update social account
-        social_account_data = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "platform": request.platform.value,
-            "handle": request.handle,
-            "followers": request.followers,
-            "is_primary": True,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        
-        social_account = await db_ops.create_social_account(social_account_data)
+        # Get (or create) the social account
+        social_account_id = await db_ops.ensure_social_account(
+            user_id, request.platform.value, request.handle, request.followers
+        )
         
         # Create media kit
         media_kit_data = {
             "id": str(uuid.uuid4()),
             "user_id": user_id,
-            "social_account_id": social_account["id"],
+            "social_account_id": social_account_id,
             "title": f"{profile.get('full_name', request.handle)}'s Media Kit",
             "bio": request.bio,
             "top_posts": [post.dict() for post in request.top_posts],
@@ -90,6 +209,9 @@ async def create_media_kit(
         
         media_kit = await db_ops.create_media_kit(media_kit_data)
         
+        # Pre-render the PDF so the first download is served from cache
+        _write_in_background(_prerender_pdf(db_ops, media_kit["id"]), f"PDF pre-render for kit {media_kit['id']}")
+        
         # Generate response
         username = profile.get("username") or request.handle
         base_url = "https://Ifluencesa.app"  # TODO: Get from config
@@ -152,7 +274,8 @@ async def get_media_kit(
             contact_email=media_kit_data.get("contact_info", {}).get("email"),
             avatar_url=profile.get("avatar_url"),
             created_at=datetime.fromisoformat(media_kit_data["created_at"]),
-            view_count=media_kit_data.get("view_count", 0)
+            # The lookup may be cached; add views recorded since
+            view_count=view_buffer.estimate(media_kit_data["id"], media_kit_data.get("view_count") or 0)
         )
         
         return response
@@ -193,8 +316,11 @@ async def track_media_kit_view(
             "viewed_at": datetime.utcnow().isoformat()
         }
         
-        view_count = await db_ops.track_media_kit_view(
-            media_kit_data["id"], 
+        # Buffered and written in bulk; the count is an estimate
+        view_count = view_buffer.record(
+            db_ops,
+            media_kit_data["id"],
+            media_kit_data.get("view_count") or 0,
             viewer_data
         )
         
@@ -216,10 +342,17 @@ async def track_media_kit_view(
 async def generate_media_kit_pdf(
     kit_id: str,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    if_none_match: Optional[str] = Header(None),
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
     db_ops: DatabaseOperations = Depends(get_db_operations)
 ):
     """
     Generate and download PDF version of media kit
+    
+    Renders are cached by a hash of their inputs, which doubles as the ETag.
+    While a render is pending the response is 202 with the job status.
+    The PDF is streamed in chunks from the cache and supports Range requests.
     """
     try:
         # Verify authentication for PDF generation
@@ -229,14 +362,15 @@ async def generate_media_kit_pdf(
         else:
             user_id = None
         
-        # Fetch media kit
-        media_kit = await db_ops.get_media_kit(kit_id)
+        # Fetch media kit with its profile, account and analysis in one round trip
+        bundle = await db_ops.get_media_kit_bundle(kit_id)
         
-        if not media_kit:
+        if not bundle:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Media kit not found"
             )
+        media_kit = bundle["media_kit"]
         
         # Check permissions (owner or public)
         if not media_kit.get("is_public") and media_kit.get("user_id") != user_id:
@@ -245,45 +379,66 @@ async def generate_media_kit_pdf(
                 detail="Access denied"
             )
         
-        # Get user profile for additional data
-        profile = await db_ops.get_profile(media_kit["user_id"])
-        
         # Prepare data for PDF generation
-        pdf_data = {
-            "username": profile.get("username", "creator"),
-            "full_name": profile.get("full_name"),
-            "handle": media_kit.get("handle", ""),
-            "platform": media_kit.get("platform", "instagram"),
-            "followers": media_kit.get("followers", 0),
-            "engagement_rate": media_kit.get("engagement_rate", 0),
-            "avg_likes": media_kit.get("avg_likes", 0),
-            "avg_comments": media_kit.get("avg_comments", 0),
-            "engagement_quality": "good",  # Default
-            "bio": media_kit.get("bio", "Content creator and influencer"),
-            "top_posts": media_kit.get("top_posts", []),
-            "contact_email": media_kit.get("contact_info", {}).get("email", ""),
-            "avatar_url": profile.get("avatar_url"),
-            "insights": []  # TODO: Get from engagement analysis
-        }
+        pdf_data = _bundle_render_data(bundle)
+        
+        cache_key = pdf_cache_key(kit_id, pdf_data, template_fingerprint())
+        etag = f'"{cache_key.rsplit(".", 1)[1]}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        
+        # Client already holds this exact rendition
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        
+        cached = pdf_cache.open(cache_key)
+        if cached is None:
+            # Render in the background (joining any job already running)
+            try:
+                job = _enqueue_pdf_render(db_ops, media_kit, pdf_data, cache_key)
+            except JobQueueFull:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="PDF rendering is busy, please retry shortly",
+                    headers={"Retry-After": str(pdf_job_queue.retry_after())}
+                )
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=jsonable_encoder(_pdf_job_status(job)),
+                headers={
+                    "Retry-After": str(pdf_job_queue.retry_after()),
+                    "Location": f"/api/v1/pdf-jobs/{job.id}"
+                }
+            )
         
-        # Generate PDF
-        pdf_generator = get_pdf_generator()
-        pdf_bytes = pdf_generator.generate_media_kit_pdf(pdf_data)
+        pdf_file, size = cached
+        filename = f"{pdf_data['username']}-media-kit.pdf"
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Accept-Ranges": "bytes",
+            **cache_headers
+        }
         
-        # Update PDF generation timestamp
-        await db_ops.update_media_kit(kit_id, {
-            "pdf_generated_at": datetime.utcnow().isoformat()
-        })
+        # A Range only applies if the client's copy is still this rendition
+        try:
+            byte_range = parse_byte_range(range, size) if not if_range or if_range.strip() == etag else None
+        except RangeNotSatisfiable:
+            pdf_file.close()
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{size}", **cache_headers}
+            )
         
-        # Return PDF as streaming response
-        filename = f"{pdf_data['username']}-media-kit.pdf"
+        start, end = byte_range or (0, size - 1)
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
         
+        # Return PDF as streaming response, one chunk in memory at a time
         return StreamingResponse(
-            io.BytesIO(pdf_bytes),
+            iter_file_range(pdf_file, start, end, settings.pdf_stream_chunk_size),
+            status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
             media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
+            headers=headers
         )
         
     except HTTPException:
@@ -295,6 +450,180 @@ async def generate_media_kit_pdf(
             detail="Failed to generate PDF"
         )
 
+@router.get("/media-kit/{kit_id}/preview")
+async def get_media_kit_preview(
+    kit_id: str,
+    format: str = Query("html", pattern="^(html|png)$"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    if_none_match: Optional[str] = Header(None),
+    db_ops: DatabaseOperations = Depends(get_db_operations)
+):
+    """
+    Lightweight preview of a media kit for dashboards and link cards
+    
+    `html` is a standalone page with the stylesheet inlined; `png` is a small
+    summary card. Both are cached and far cheaper than the PDF.
+    """
+    try:
+        if credentials:
+            user_data = verify_token(credentials.credentials)
+            user_id = user_data.get("sub")
+        else:
+            user_id = None
+        
+        # Fetch media kit with everything the render needs
+        bundle = await db_ops.get_media_kit_bundle(kit_id)
+        
+        if not bundle:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Media kit not found"
+            )
+        media_kit = bundle["media_kit"]
+        
+        # Check permissions (owner or public)
+        if not media_kit.get("is_public") and media_kit.get("user_id") != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+        
+        preview_data = _bundle_render_data(bundle)
+        
+        cache_key = pdf_cache_key(kit_id, preview_data, template_fingerprint())
+        etag = f'"{format}-{cache_key.rsplit(".", 1)[1]}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        
+        # Template rendering / drawing may fetch the avatar, so keep it off the loop
+        content, media_type = await run_in_threadpool(
+            preview_renderer.render, format, cache_key, preview_data
+        )
+        return Response(content=content, media_type=media_type, headers=cache_headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Preview failed for kit {kit_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to render preview"
+        )
+
+@router.post("/media-kit/export")
+async def export_media_kits(
+    request: MediaKitExportRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db_ops: DatabaseOperations = Depends(get_db_operations)
+):
+    """
+    Download PDFs of several media kits as one ZIP archive
+    
+    Kits render in parallel and each PDF is streamed into the archive as soon
+    as it is ready. Kits that can't be exported are listed in errors.txt.
+    """
+    try:
+        # Verify authentication
+        user_data = verify_token(credentials.credentials)
+        user_id = user_data.get("sub")
+        
+        if request.all_kits:
+            media_kits = await db_ops.get_user_media_kits(user_id)
+        elif request.kit_ids:
+            media_kits = await db_ops.get_media_kits(list(dict.fromkeys(request.kit_ids)))
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide kit_ids or set all_kits"
+            )
+        
+        # Same rule as single downloads: owner or public
+        errors = []
+        found = {kit["id"] for kit in media_kits}
+        errors += [f"{kit_id}: not found" for kit_id in request.kit_ids if kit_id not in found]
+        allowed = []
+        for kit in media_kits:
+            if kit.get("is_public") or kit.get("user_id") == user_id:
+                allowed.append(kit)
+            else:
+                errors.append(f"{kit['id']}: access denied")
+        
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No media kits to export"
+            )
+        
+        # Profiles, accounts and analyses for every kit in one query
+        bundles = await db_ops.get_media_kit_bundles([kit["id"] for kit in allowed])
+        
+        async def entries():
+            results = as_completed_bounded(
+                bundles,
+                lambda bundle: _open_kit_pdf(db_ops, bundle),
+                settings.pdf_export_concurrency
+            )
+            async for bundle, pdf_file, error in results:
+                kit = bundle["media_kit"]
+                if error is not None:
+                    logger.error(f"Export of media kit {kit['id']} failed: {error}")
+                    errors.append(f"{kit['id']}: rendering failed")
+                    continue
+                username = (bundle.get("profile") or {}).get("username", "creator")
+                yield f"{username}-{kit['id'][:8]}-media-kit.pdf", pdf_file
+            if errors:
+                yield "errors.txt", "\n".join(errors).encode("utf-8")
+        
+        return StreamingResponse(
+            stream_zip(entries(), settings.pdf_stream_chunk_size),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": "attachment; filename=media-kits.zip"
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Media kit export failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export media kits"
+        )
+
+@router.get("/pdf-jobs/{job_id}", response_model=PDFJobStatus)
+async def get_pdf_job_status(
+    job_id: str,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+):
+    """
+    Get the status of a background PDF render
+    """
+    try:
+        user_id = verify_token(credentials.credentials).get("sub") if credentials else None
+        
+        job = pdf_job_queue.get(job_id)
+        
+        # Private kits' jobs are only visible to their owner
+        if not job or (not job.is_public and job.user_id != user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="PDF job not found"
+            )
+        
+        return _pdf_job_status(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch PDF job {job_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch PDF job"
+        )
+
 @router.get("/media-kit/{kit_id}")
 async def get_media_kit_by_id(
     kit_id: str,
@@ -335,3 +664,51 @@ async def get_media_kit_by_id(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch media kit"
         )
+
+@router.get("/media-kits", response_model=ListPage)
+async def list_media_kits(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: str = Query("summary", pattern="^(summary|full)$"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db_ops: DatabaseOperations = Depends(get_db_operations)
+):
+    """
+    List the caller's media kits, newest first
+    
+    Pages are keyset-paginated: pass `next_cursor` back as `cursor` for the
+    next page. `summary` returns the fields a dashboard lists; `full` returns
+    whole rows.
+    """
+    try:
+        # Verify authentication
+        user_data = verify_token(credentials.credentials)
+        user_id = user_data.get("sub")
+        
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication token"
+            )
+        
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        
+        # One extra row tells us whether there is a next page
+        rows = await db_ops.list_media_kits(user_id, limit + 1, after, fields)
+        items, next_cursor = paginate(rows, limit)
+        return ListPage(items=items, next_cursor=next_cursor)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to list media kits: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list media kits"
+        )
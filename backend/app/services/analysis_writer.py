@@ -0,0 +1,187 @@
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import logging
+import time
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (user_id, platform, handle, followers) the analysis belongs to
+AccountKey = Tuple[str, str, str, int]
+
+def _is_duplicate(error: Exception) -> bool:
+    """Whether an insert failed on a primary key conflict (PostgREST 409 / Postgres 23505)"""
+    if getattr(error, "status_code", None) == 409 or getattr(error, "code", None) == "23505":
+        return True
+    return "duplicate key" in str(error)
+
+class AnalysisWriter:
+    """
+    Write-behind persistence for engagement analyses
+    
+    `submit` queues an analysis row and returns immediately; a background
+    task drains the queue in batches of up to `batch_size`, resolves each
+    batch's social account ids and stores the rows with one multi-row insert.
+    Failed batches are retried with exponential backoff, then written row by
+    row so one bad row can't lose the others. Rows carry their own ids, so a
+    retry that conflicts with an insert which committed but timed out is
+    treated as stored. When the bounded queue is full, `submit` waits for
+    space (backpressure) rather than dropping work.
+    """
+    
+    def __init__(
+        self,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_attempts: int = 4,
+        retry_delay: float = 0.5
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._db_ops = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writing: List[Tuple[AccountKey, Dict[str, Any]]] = []
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self._batched_rows = 0
+        self.retries = 0
+        self.failed = 0
+        self.backpressure_waits = 0
+        self._backpressure_seconds = 0.0
+        self.max_depth = 0
+    
+    def start(self, db_ops) -> None:
+        """Start the background writer, storing rows through `db_ops`"""
+        if self._db_ops is None:
+            self._db_ops = db_ops
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def submit(self, db_ops, account: AccountKey, analysis_data: Dict[str, Any]) -> None:
+        """Queue an analysis row; social_account_id is filled in when it is written"""
+        self.start(db_ops)
+        item = (account, analysis_data)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.backpressure_waits += 1
+            started = time.perf_counter()
+            await self._queue.put(item)
+            self._backpressure_seconds += time.perf_counter() - started
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+    
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent requests a moment to join the batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._writing = batch
+            try:
+                await self._write(batch)
+            finally:
+                self._writing = []
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _write(self, batch: List[Tuple[AccountKey, Dict[str, Any]]]) -> None:
+        """Store a batch, retrying with backoff and finally row by row"""
+        for attempt in range(self.max_attempts):
+            try:
+                rows = await self._resolve_accounts(batch)
+                await self._db_ops.create_engagement_analyses(rows)
+                self.batches += 1
+                self._batched_rows += len(rows)
+                self.written += len(rows)
+                return
+            except Exception as e:
+                if _is_duplicate(e):
+                    # Some rows are already stored; the row-by-row pass skips them
+                    break
+                if attempt + 1 == self.max_attempts:
+                    logger.error(f"Failed to store {len(batch)} analyses after {self.max_attempts} attempts: {e}")
+                    break
+                self.retries += 1
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning(f"Storing {len(batch)} analyses failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        
+        for item in batch:
+            try:
+                rows = await self._resolve_accounts([item])
+                await self._db_ops.create_engagement_analyses(rows)
+                self.written += 1
+            except Exception as e:
+                if _is_duplicate(e):
+                    self.written += 1
+                    continue
+                self.failed += 1
+                logger.error(f"Dropping analysis {item[1].get('id')}: {e}")
+    
+    async def _resolve_accounts(self, batch: List[Tuple[AccountKey, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Analysis rows with their social account ids (cached after the first lookup)"""
+        ids: Dict[AccountKey, str] = {}
+        rows = []
+        for account, analysis_data in batch:
+            if account not in ids:
+                ids[account] = await self._db_ops.ensure_social_account(*account)
+            rows.append({**analysis_data, "social_account_id": ids[account]})
+        return rows
+    
+    async def close(self, timeout: float = 10.0) -> None:
+        """Wait (up to `timeout` seconds) for queued analyses to be written, then stop"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            # The batch being written may or may not have committed
+            unwritten = list(self._writing)
+            while not self._queue.empty():
+                unwritten.append(self._queue.get_nowait())
+                self._queue.task_done()
+            self.failed += len(unwritten)
+            ids = ", ".join(str(analysis_data.get("id")) for _, analysis_data in unwritten)
+            logger.error(f"Shutting down with {len(unwritten)} analyses possibly unwritten: {ids}")
+        self._task.cancel()
+        self._task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and backpressure counters for monitoring"""
+        return {
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "capacity": self.queue_size,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch": round(self._batched_rows / self.batches, 1) if self.batches else None,
+            "retries": self.retries,
+            "failed": self.failed,
+            "backpressure_waits": self.backpressure_waits,
+            "backpressure_ms": round(self._backpressure_seconds * 1000, 1)
+        }
+
+# Global writer; started with the first analysis (or the lifespan)
+analysis_writer = AnalysisWriter(
+    queue_size=settings.analysis_write_queue_size,
+    batch_size=settings.analysis_write_batch_size,
+    flush_interval=settings.analysis_write_interval,
+    max_attempts=settings.analysis_write_attempts
+)
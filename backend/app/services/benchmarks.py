@@ -0,0 +1,181 @@
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from bisect import bisect_left, bisect_right
+import asyncio
+import logging
+import math
+import threading
+from app.config import settings
+from app.models.user import Platform
+
+logger = logging.getLogger(__name__)
+
+# Follower bucket boundaries (same tiers as the brand readiness score)
+FOLLOWER_BUCKETS = [1000, 5000, 10000, 50000, 100000]
+
+# Relative accuracy of the sketch; must match benchmark_sketch_key() in schema.sql
+SKETCH_ALPHA = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+SKETCH_MIN_VALUE = 0.0001
+
+def follower_bucket(followers: int) -> int:
+    """Index of the follower bucket an account falls into"""
+    return bisect_right(FOLLOWER_BUCKETS, followers)
+
+def sketch_key(value: float) -> int:
+    """Logarithmic bucket key for an engagement rate"""
+    return math.ceil(math.log(max(value, SKETCH_MIN_VALUE)) / math.log(SKETCH_GAMMA))
+
+class QuantileSketch:
+    """
+    Mergeable log-bucketed quantile sketch (DDSketch-style)
+    
+    Values are counted in buckets whose width grows geometrically, giving a
+    fixed relative error. Sketches merge by adding bucket counts, and rank
+    lookups are a binary search over the cumulative counts.
+    """
+    
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self._keys: Optional[List[int]] = None
+        self._cumulative: List[int] = []
+    
+    def add(self, value: float, count: int = 1) -> None:
+        """Add a value (or `count` copies of it)"""
+        self.add_key(sketch_key(value), count)
+    
+    def add_key(self, key: int, count: int = 1) -> None:
+        """Add counts directly to a bucket key"""
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+        self._keys = None
+    
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch's counts into this one"""
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+        self._keys = None
+        return self
+    
+    def _index(self) -> None:
+        """Rebuild the sorted key / cumulative count index after updates"""
+        keys = sorted(self.buckets)
+        cumulative = []
+        running = 0
+        for key in keys:
+            running += self.buckets[key]
+            cumulative.append(running)
+        self._keys = keys
+        self._cumulative = cumulative
+    
+    def percentile(self, value: float) -> Optional[float]:
+        """Percentile rank (0-100) of a value, or None if the sketch is empty"""
+        if self.count == 0:
+            return None
+        if self._keys is None:
+            self._index()
+        
+        key = sketch_key(value)
+        lo = bisect_left(self._keys, key)
+        below = self._cumulative[lo - 1] if lo > 0 else 0
+        equal = self.buckets.get(key, 0)
+        return (below + equal / 2) / self.count * 100
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile q (0-1)"""
+        if self.count == 0:
+            return None
+        if self._keys is None:
+            self._index()
+        
+        rank = q * (self.count - 1)
+        idx = min(bisect_right(self._cumulative, rank), len(self._keys) - 1)
+        # Bucket midpoint in log space
+        return 2 * SKETCH_GAMMA ** self._keys[idx] / (SKETCH_GAMMA + 1)
+
+class BenchmarkIndex:
+    """Per-platform, per-follower-bucket engagement rate distributions"""
+    
+    def __init__(self, min_samples: int = 100):
+        self.min_samples = min_samples
+        self._sketches: Dict[Tuple[str, int], QuantileSketch] = {}
+        self._platform_sketches: Dict[str, QuantileSketch] = {}
+        self._lock = threading.Lock()
+        # Bumped whenever the sketches change, so graded results can be reused until then
+        self.version = 0
+    
+    def record(self, platform: Platform, followers: int, engagement_rate: float) -> None:
+        """Add a newly stored analysis to the in-process sketches"""
+        platform = Platform(platform).value
+        key = sketch_key(engagement_rate)
+        with self._lock:
+            self._sketches.setdefault((platform, follower_bucket(followers)), QuantileSketch()).add_key(key)
+            self._platform_sketches.setdefault(platform, QuantileSketch()).add_key(key)
+            self.version += 1
+    
+    def load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Replace the sketches with rows from the engagement_benchmarks table"""
+        sketches: Dict[Tuple[str, int], QuantileSketch] = {}
+        platform_sketches: Dict[str, QuantileSketch] = {}
+        for row in rows:
+            platform = row["platform"]
+            count = int(row["count"])
+            sketches.setdefault((platform, int(row["follower_bucket"])), QuantileSketch()).add_key(
+                int(row["sketch_key"]), count
+            )
+            platform_sketches.setdefault(platform, QuantileSketch()).add_key(int(row["sketch_key"]), count)
+        
+        with self._lock:
+            self._sketches = sketches
+            self._platform_sketches = platform_sketches
+            self.version += 1
+    
+    def percentile(self, platform: Platform, followers: int, engagement_rate: float) -> Optional[float]:
+        """
+        Percentile of an engagement rate among comparable accounts
+        
+        Falls back to the platform-wide distribution when the follower bucket
+        has too few samples, and returns None when neither does.
+        """
+        platform = Platform(platform).value
+        with self._lock:
+            for sketch in (
+                self._sketches.get((platform, follower_bucket(followers))),
+                self._platform_sketches.get(platform)
+            ):
+                if sketch is not None and sketch.count >= self.min_samples:
+                    return sketch.percentile(engagement_rate)
+        return None
+    
+    def typical_rate(self, platform: Platform) -> Optional[float]:
+        """Platform-wide median engagement rate, or None until it has `min_samples`"""
+        platform = Platform(platform).value
+        with self._lock:
+            sketch = self._platform_sketches.get(platform)
+            if sketch is not None and sketch.count >= self.min_samples:
+                return sketch.quantile(0.5)
+        return None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Sample counts per platform and follower bucket"""
+        with self._lock:
+            return {
+                f"{platform}:{bucket}": sketch.count
+                for (platform, bucket), sketch in sorted(self._sketches.items())
+            }
+
+# Global benchmark index, loaded at startup and updated on every stored analysis
+benchmark_index = BenchmarkIndex(min_samples=settings.benchmark_min_samples)
+
+async def refresh_benchmarks_periodically(db_ops, interval: int) -> None:
+    """Reload the sketches from engagement_benchmarks every `interval` seconds"""
+    while True:
+        try:
+            rows = await db_ops.get_engagement_benchmarks()
+            # An empty result may be a failed read; keep what we have
+            if rows:
+                benchmark_index.load(rows)
+        except Exception as e:
+            logger.warning(f"Benchmark refresh failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,193 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Optional, Tuple
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from app.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Thumbnail sizes (pixels) for the template's image slots, at 2x the CSS size
+IMAGE_SLOTS = {
+    "avatar": (160, 160),
+    "post": (480, 240)
+}
+
+# Failed URLs are not retried for this long so a dead host can't stall renders
+FAILURE_TTL = 300  # seconds
+
+class ImageCache:
+    """
+    On-disk cache of downscaled remote images for PDF rendering
+    
+    Images are fetched (with a timeout and size limit), cropped to their slot
+    with Pillow and stored as JPEG thumbnails keyed by URL and slot. `fetch`
+    is a WeasyPrint url_fetcher that serves thumbnails from the cache and
+    substitutes a placeholder when an image can't be loaded.
+    """
+    
+    def __init__(
+        self,
+        directory: str = "",
+        timeout: float = 5.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_image_bytes: int = 10 * 1024 * 1024,
+        concurrency: int = 8
+    ):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "ifluencesa-image-cache")
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_image_bytes = max_image_bytes
+        self.concurrency = concurrency
+        self._client: Optional["httpx.Client"] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._failures: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._disk_size: Optional[int] = None
+        self._placeholder: Optional[bytes] = None
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _path(self, url: str, slot: str) -> str:
+        digest = hashlib.sha256(f"{slot}:{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.jpg")
+    
+    def _get_client(self) -> "httpx.Client":
+        with self._lock:
+            if self._client is None:
+                import httpx
+                self._client = httpx.Client(timeout=self.timeout, follow_redirects=True)
+            return self._client
+    
+    def prefetch(self, images: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        Make sure thumbnails for (url, slot) pairs are on disk
+        
+        Missing images are downloaded concurrently; returns the url -> slot
+        map to pass to `fetch`.
+        """
+        slots = {url: slot for url, slot in images if url and url.startswith(("http://", "https://"))}
+        missing = [(url, slot) for url, slot in slots.items() if not os.path.exists(self._path(url, slot))]
+        if missing:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="image-fetch")
+            list(self._executor.map(lambda item: self._load(*item), missing))
+        return slots
+    
+    def _load(self, url: str, slot: str) -> Optional[str]:
+        """Download, downscale and store one thumbnail; None on failure"""
+        from PIL import Image, ImageOps
+        
+        path = self._path(url, slot)
+        if os.path.exists(path):
+            return path
+        failed_at = self._failures.get(url)
+        if failed_at is not None and time.monotonic() - failed_at < FAILURE_TTL:
+            return None
+        
+        try:
+            raw = io.BytesIO()
+            with self._get_client().stream("GET", url) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes():
+                    raw.write(chunk)
+                    if raw.tell() > self.max_image_bytes:
+                        raise ValueError("image too large")
+            
+            raw.seek(0)
+            with Image.open(raw) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.mode != "RGB":
+                    # Flatten transparency onto white, as it would appear on the page
+                    background = Image.new("RGB", image.size, (255, 255, 255))
+                    background.paste(image, mask=image.convert("RGBA"))
+                    image = background
+                thumbnail = ImageOps.fit(image, IMAGE_SLOTS[slot], Image.LANCZOS)
+            
+            # Write-then-rename so concurrent renders never read a partial file
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            thumbnail.save(tmp_path, "JPEG", quality=85, optimize=True)
+            os.replace(tmp_path, path)
+            self._account(os.path.getsize(path))
+            return path
+        except Exception as e:
+            logger.warning(f"Failed to cache image {url}: {e}")
+            self._failures[url] = time.monotonic()
+            return None
+    
+    def _account(self, added: int) -> None:
+        """Track disk usage and drop the oldest thumbnails when over budget"""
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(
+                    entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith(".jpg")
+                )
+            else:
+                self._disk_size += added
+            if self._disk_size <= self.max_bytes:
+                return
+            
+            entries = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.name.endswith(".jpg")),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            for entry in entries:
+                if self._disk_size <= self.max_bytes * 0.9:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    self._disk_size -= size
+                except OSError:
+                    pass
+    
+    def placeholder(self) -> bytes:
+        """Neutral grey image used when a remote image can't be loaded"""
+        if self._placeholder is None:
+            from PIL import Image
+            buffer = io.BytesIO()
+            Image.new("RGB", (8, 8), (229, 231, 235)).save(buffer, "PNG")
+            self._placeholder = buffer.getvalue()
+        return self._placeholder
+    
+    def fetch(self, url: str, slots: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """WeasyPrint url_fetcher serving remote images from the thumbnail cache"""
+        # Only known image slots are thumbnailed; stylesheets, fonts etc. pass through
+        if not slots or url not in slots:
+            from weasyprint import default_url_fetcher
+            return default_url_fetcher(url)
+        
+        path = self._load(url, slots[url])
+        if path is None:
+            return {"string": self.placeholder(), "mime_type": "image/png"}
+        with open(path, "rb") as f:
+            return {"string": f.read(), "mime_type": "image/jpeg", "redirected_url": url}
+
+def media_kit_images(data: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """(url, slot) pairs for every image a media kit template embeds"""
+    if data.get("avatar_url"):
+        yield data["avatar_url"], "avatar"
+    for post in data.get("top_posts") or []:
+        if post.get("image_url"):
+            yield post["image_url"], "post"
+
+_image_cache: Optional[ImageCache] = None
+
+def get_image_cache() -> ImageCache:
+    """Get the process-wide image cache"""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache(
+            directory=settings.image_cache_dir,
+            timeout=settings.image_fetch_timeout,
+            max_bytes=settings.image_cache_max_bytes,
+            concurrency=settings.image_fetch_concurrency
+        )
+    return _image_cache
@@ -0,0 +1,289 @@
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from string import Formatter
+import json
+import logging
+import operator
+import os
+import numpy as np
+from app.models.user import Platform
+
+logger = logging.getLogger(__name__)
+
+# Rule packs are lists of groups. Groups are tried in priority order and at
+# most one rule (the first whose conditions all hold) fires per group. A group
+# is skipped when any feature in "requires" is unavailable for the account.
+DEFAULT_RULE_PACK = [
+    {
+        "group": "engagement_rate",
+        "priority": 100,
+        "rules": [
+            {
+                "when": [["industry_ratio", ">", 1.5]],
+                "text": "Your engagement rate is {industry_ratio:.1f}x above industry average"
+            },
+            {
+                "when": [["industry_ratio", ">", 1]],
+                "text": "Your engagement rate is above industry average"
+            },
+            {"when": [], "text": "Focus on creating more engaging content to improve your rate"}
+        ]
+    },
+    {
+        "group": "comment_ratio",
+        "priority": 90,
+        "requires": ["comment_ratio"],
+        "rules": [
+            {
+                "when": [["comment_ratio", ">", 0.15]],
+                "text": "Excellent comment engagement shows strong audience connection"
+            },
+            {
+                "when": [["comment_ratio", ">", 0.08]],
+                "text": "Good balance of likes and comments indicates engaged audience"
+            },
+            {"when": [], "text": "Consider asking questions to encourage more comments"}
+        ]
+    },
+    {
+        "group": "audience_size",
+        "priority": 80,
+        "rules": [
+            {
+                "when": [["followers", ">", 100000]],
+                "text": "Large audience with strong reach potential for brand partnerships"
+            },
+            {
+                "when": [["followers", ">", 10000]],
+                "text": "Growing audience size is attractive to mid-tier brand collaborations"
+            },
+            {"when": [], "text": "Focus on consistent posting and engagement to grow your audience"}
+        ]
+    },
+    {
+        "group": "consistency",
+        "priority": 70,
+        "requires": ["consistency"],
+        "rules": [
+            {
+                "when": [["consistency", ">", 0.7]],
+                "text": "Consistent engagement across posts shows reliable audience interest"
+            },
+            {"when": [], "text": "Engagement varies significantly - analyze your top posts for patterns"}
+        ]
+    }
+]
+
+PLATFORM_RULE_PACKS = {
+    Platform.INSTAGRAM.value: [
+        {
+            "group": "platform",
+            "priority": 60,
+            "rules": [
+                {
+                    "when": [["likes_per_comment", ">", 20]],
+                    "text": "Consider using Instagram Stories and Reels to boost engagement"
+                }
+            ]
+        }
+    ],
+    Platform.TIKTOK.value: [
+        {
+            "group": "platform",
+            "priority": 60,
+            "rules": [
+                {
+                    "when": [["engagement_rate", "<", 3]],
+                    "text": "TikTok thrives on trending content - try incorporating popular sounds and hashtags"
+                }
+            ]
+        }
+    ],
+    Platform.YOUTUBE.value: [
+        {
+            "group": "platform",
+            "priority": 60,
+            "rules": [
+                {
+                    "when": [["comments_per_like", "<", 0.02]],
+                    "text": "Encourage viewers to comment by asking questions in your videos"
+                }
+            ]
+        }
+    ]
+}
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne
+}
+
+# Derived features: name -> (scalar function, vectorized function). Each
+# receives the FeatureSet and pulls its own inputs, so only features a
+# surviving rule asks for are ever computed.
+def _ratio(numerator: float, denominator: float, when_zero: Optional[float]) -> Optional[float]:
+    return numerator / denominator if denominator > 0 else when_zero
+
+def _ratio_vec(numerator: np.ndarray, denominator: np.ndarray, when_zero: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, when_zero)
+
+DERIVED_FEATURES: Dict[str, Tuple[Callable, Callable]] = {
+    "industry_ratio": (
+        lambda f: f["engagement_rate"] / f["industry_avg"],
+        lambda f: f["engagement_rate"] / f["industry_avg"]
+    ),
+    "comment_ratio": (
+        lambda f: _ratio(f["avg_comments"], f["avg_likes"] + f["avg_comments"], None),
+        lambda f: _ratio_vec(f["avg_comments"], f["avg_likes"] + f["avg_comments"], np.nan)
+    ),
+    "likes_per_comment": (
+        lambda f: _ratio(f["avg_likes"], f["avg_comments"], float("inf") if f["avg_likes"] > 0 else 0.0),
+        lambda f: _ratio_vec(f["avg_likes"], f["avg_comments"], np.where(f["avg_likes"] > 0, np.inf, 0.0))
+    ),
+    "comments_per_like": (
+        lambda f: _ratio(f["avg_comments"], f["avg_likes"], float("inf")),
+        lambda f: _ratio_vec(f["avg_comments"], f["avg_likes"], np.inf)
+    )
+}
+
+class FeatureSet:
+    """
+    Lazily evaluated features for one account (scalars) or many (arrays)
+    
+    `values` holds features that are already known; `providers` maps names to
+    zero-argument callables for inputs that are expensive to compute.
+    """
+    
+    def __init__(
+        self,
+        values: Dict[str, Any],
+        providers: Optional[Dict[str, Callable[[], Any]]] = None,
+        vectorized: bool = False
+    ):
+        self._values = dict(values)
+        self._providers = providers or {}
+        self._vectorized = vectorized
+    
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._values:
+            if name in self._providers:
+                self._values[name] = self._providers[name]()
+            elif name in DERIVED_FEATURES:
+                self._values[name] = DERIVED_FEATURES[name][1 if self._vectorized else 0](self)
+            else:
+                raise KeyError(f"Unknown insight feature: {name}")
+        return self._values[name]
+    
+    def computed(self) -> List[str]:
+        """Names of features evaluated so far"""
+        return list(self._values)
+
+class _CompiledRule:
+    __slots__ = ("conditions", "text", "fields")
+    
+    def __init__(self, spec: Dict[str, Any]):
+        self.conditions = [(name, _OPERATORS[op], value) for name, op, value in spec.get("when", [])]
+        self.text = spec["text"]
+        self.fields = [field for _, field, _, _ in Formatter().parse(self.text) if field]
+    
+    def matches(self, features: FeatureSet) -> bool:
+        for name, op, value in self.conditions:
+            if not op(features[name], value):
+                return False
+        return True
+    
+    def matches_vec(self, features: FeatureSet) -> np.ndarray:
+        mask = True
+        for name, op, value in self.conditions:
+            mask = mask & op(features[name], value)
+        return mask
+    
+    def render(self, features: Any) -> str:
+        if not self.fields:
+            return self.text
+        return self.text.format_map({field: features[field] for field in self.fields})
+
+class _CompiledGroup:
+    __slots__ = ("name", "priority", "requires", "rules")
+    
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec["group"]
+        self.priority = spec.get("priority", 0)
+        self.requires = list(spec.get("requires", []))
+        self.rules = [_CompiledRule(rule) for rule in spec["rules"]]
+
+class InsightEngine:
+    """Prioritized, short-circuiting evaluator for a compiled rule pack"""
+    
+    def __init__(self, rule_pack: List[Dict[str, Any]]):
+        groups = [_CompiledGroup(group) for group in rule_pack]
+        # Stable sort keeps pack order for equal priorities
+        self.groups = sorted(groups, key=lambda g: -g.priority)
+    
+    def evaluate(self, features: FeatureSet, limit: int = 3) -> List[str]:
+        """Return up to `limit` insights for a single account"""
+        insights = []
+        for group in self.groups:
+            if len(insights) >= limit:
+                break
+            if any(features[name] is None for name in group.requires):
+                continue
+            for rule in group.rules:
+                if rule.matches(features):
+                    insights.append(rule.render(features))
+                    break
+        return insights
+    
+    def evaluate_batch(self, features: FeatureSet, size: int, limit: int = 3) -> List[List[str]]:
+        """Return up to `limit` insights for each of `size` accounts"""
+        insights: List[List[str]] = [[] for _ in range(size)]
+        counts = np.zeros(size, dtype=np.int64)
+        for group in self.groups:
+            active = counts < limit
+            if not active.any():
+                break
+            for name in group.requires:
+                active &= ~np.isnan(features[name])
+            
+            for rule in group.rules:
+                if not active.any():
+                    break
+                fired = active & rule.matches_vec(features)
+                for idx in np.flatnonzero(fired).tolist():
+                    insights[idx].append(rule.render(
+                        {field: float(features[field][idx]) for field in rule.fields}
+                    ))
+                counts += fired
+                active &= ~fired
+        return insights
+
+def load_rule_pack(path: str) -> List[Dict[str, Any]]:
+    """Load a rule pack (list of groups) from a JSON file"""
+    with open(path) as f:
+        return json.load(f)
+
+_engines: Dict[str, InsightEngine] = {}
+
+def get_insight_engine(platform: Platform, rules_dir: str = "") -> InsightEngine:
+    """
+    Compiled engine for a platform: the default pack plus its platform pack
+    
+    A `<platform>.json` file in `rules_dir` replaces the built-in platform pack.
+    """
+    platform = Platform(platform).value
+    engine = _engines.get(platform)
+    if engine is None:
+        platform_pack = PLATFORM_RULE_PACKS.get(platform, [])
+        pack_path = os.path.join(rules_dir, f"{platform}.json") if rules_dir else ""
+        if pack_path and os.path.exists(pack_path):
+            try:
+                platform_pack = load_rule_pack(pack_path)
+            except Exception as e:
+                logger.error(f"Failed to load insight rule pack {pack_path}: {e}")
+        engine = InsightEngine(DEFAULT_RULE_PACK + platform_pack)
+        _engines[platform] = engine
+    return engine
@@ -0,0 +1,88 @@
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.utils.cache import TTLCache, MISSING
+
+class PublicKitCache:
+    """
+    Read-through cache of public media kit lookups by username
+    
+    Found kits are kept for `ttl` seconds and unknown usernames for the
+    shorter `negative_ttl`. Entries are dropped explicitly when a kit or its
+    owner's profile changes (via the kit id / user id indexes); the TTL bounds
+    staleness across worker processes, which don't see each other's
+    invalidations.
+    """
+    
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self._kits = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._missing = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+        self._username_by_kit = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._username_by_user = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.invalidations = 0
+    
+    def get(self, username: str) -> Any:
+        """Cached kit, None for a known-missing username, or MISSING"""
+        kit = self._kits.get(username)
+        if kit is not MISSING:
+            return dict(kit)
+        if self._missing.get(username) is not MISSING:
+            return None
+        return MISSING
+    
+    def set(self, username: str, kit: Optional[Dict[str, Any]]) -> None:
+        if kit is None:
+            self._missing.set(username, True)
+            return
+        self._kits.set(username, dict(kit))
+        self._username_by_kit.set(kit["id"], username)
+        if kit.get("user_id"):
+            self._username_by_user.set(kit["user_id"], username)
+    
+    def invalidate_username(self, username: str) -> None:
+        self._kits.pop(username)
+        self._missing.pop(username)
+        self.invalidations += 1
+    
+    def invalidate_kit(self, kit_id: str) -> None:
+        username = self._username_by_kit.pop(kit_id)
+        if username is not None:
+            self.invalidate_username(username)
+    
+    def invalidate_user(self, user_id: str) -> None:
+        username = self._username_by_user.pop(user_id)
+        if username is not None:
+            self.invalidate_username(username)
+    
+    def forget_missing(self) -> None:
+        """Drop negative entries (a new kit may answer any of them)"""
+        self._missing.clear()
+    
+    def clear(self) -> None:
+        self._kits.clear()
+        self._missing.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio across found and negative entries"""
+        found, missing = self._kits.stats(), self._missing.stats()
+        hits = found["hits"] + missing["hits"]
+        # A miss on _kits followed by a hit on _missing is still a hit
+        lookups = found["hits"] + found["misses"]
+        return {
+            "size": found["size"],
+            "negative_size": missing["size"],
+            "ttl_seconds": found["ttl_seconds"],
+            "negative_ttl_seconds": missing["ttl_seconds"],
+            "hits": hits,
+            "negative_hits": missing["hits"],
+            "misses": lookups - hits,
+            "invalidations": self.invalidations,
+            "evictions": found["evictions"],
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+# Global cache for GET /media-kit/{username} and view tracking
+public_kit_cache = PublicKitCache(
+    maxsize=settings.media_kit_cache_size,
+    ttl=settings.media_kit_cache_ttl,
+    negative_ttl=settings.media_kit_negative_ttl
+)
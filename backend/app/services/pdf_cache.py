@@ -0,0 +1,262 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, BinaryIO
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields that don't change what a render shows about the kit: bookkeeping
+# columns (updating them keeps cached PDFs) and the render's own timestamp
+RENDER_IRRELEVANT_FIELDS = {"pdf_generated_at", "view_count", "updated_at", "generated_at"}
+
+# Temp files older than this belong to renders that died; younger ones may
+# still be in flight in another worker sharing the directory
+STALE_TEMP_SECONDS = 60 * 60
+
+def pdf_cache_key(kit_id: str, render_data: Dict[str, Any], template_version: str) -> str:
+    """Content address of a render: the kit id plus a hash of every relevant render input"""
+    data = {field: value for field, value in render_data.items() if field not in RENDER_IRRELEVANT_FIELDS}
+    canonical = json.dumps(
+        {"data": data, "template": template_version},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return f"{kit_id}.{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+class PDFCache:
+    """
+    Two-tier (memory, then disk) cache of rendered PDFs
+    
+    Both tiers are bounded by total bytes and evict least recently used
+    entries first. Keys start with the kit id so every rendition of a kit can
+    be dropped when the kit changes.
+    """
+    
+    def __init__(self, memory_bytes: int = 64 * 1024 * 1024, disk_bytes: int = 512 * 1024 * 1024, directory: str = ""):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "ifluencesa-pdf-cache")
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+    
+    @property
+    def disk_enabled(self) -> bool:
+        return self.disk_bytes > 0
+    
+    def contains(self, key: str) -> bool:
+        """Whether either tier holds the key (without counting a lookup)"""
+        with self._lock:
+            return key in self._memory or key in self._disk
+    
+    def load(self) -> None:
+        """
+        Pick up files left by earlier processes, oldest first
+        
+        Called at application startup rather than import. Only temp files older
+        than STALE_TEMP_SECONDS are removed, so renders other workers are still
+        writing into the shared directory are left alone.
+        """
+        if self.disk_bytes <= 0:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            stale_before = time.time() - STALE_TEMP_SECONDS
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Renamed or removed by another worker meanwhile
+                    continue
+                if name.endswith(".tmp"):
+                    if stat.st_mtime < stale_before:
+                        # Left behind by a render that never finished
+                        with contextlib.suppress(FileNotFoundError):
+                            os.remove(path)
+                elif name.endswith(".pdf"):
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+            with self._lock:
+                for _, key, size in sorted(entries):
+                    if key not in self._disk:
+                        self._disk[key] = size
+                        self._disk_size += size
+                self._evict_disk()
+        except OSError as e:
+            logger.error(f"Failed to load PDF cache directory {self.directory}: {e}")
+            self.disk_bytes = 0
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached PDF bytes, promoting disk hits into memory"""
+        with self._lock:
+            pdf_bytes = self._memory.get(key)
+            if pdf_bytes is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return pdf_bytes
+            
+            if key in self._disk:
+                try:
+                    with open(self._path(key), "rb") as f:
+                        pdf_bytes = f.read()
+                    os.utime(self._path(key))
+                    self._disk.move_to_end(key)
+                    self.disk_hits += 1
+                    self._put_memory(key, pdf_bytes)
+                    return pdf_bytes
+                except OSError:
+                    self._disk_size -= self._disk.pop(key)
+            
+            self.misses += 1
+            return None
+    
+    def open(self, key: str) -> Optional[Tuple[BinaryIO, int]]:
+        """
+        Open a cached PDF for streaming; returns (file object, size)
+        
+        Disk hits are streamed from the file rather than loaded into memory.
+        The handle stays valid even if the entry is evicted meanwhile.
+        """
+        with self._lock:
+            pdf_bytes = self._memory.get(key)
+            if pdf_bytes is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return io.BytesIO(pdf_bytes), len(pdf_bytes)
+            
+            if key in self._disk:
+                try:
+                    f = open(self._path(key), "rb")
+                    os.utime(self._path(key))
+                    self._disk.move_to_end(key)
+                    self.disk_hits += 1
+                    return f, self._disk[key]
+                except OSError:
+                    self._disk_size -= self._disk.pop(key)
+            
+            self.misses += 1
+            return None
+    
+    def temp_path(self, key: str) -> str:
+        """Scratch path inside the cache directory for rendering `key` into"""
+        os.makedirs(self.directory, exist_ok=True)
+        return f"{self._path(key)}.{uuid.uuid4().hex}.tmp"
+    
+    def adopt(self, key: str, path: str) -> None:
+        """Move a fully written PDF (from `temp_path`) into the disk tier"""
+        with self._lock:
+            size = os.path.getsize(path)
+            os.replace(path, self._path(key))
+            if key in self._disk:
+                self._disk_size -= self._disk.pop(key)
+            self._disk[key] = size
+            self._disk_size += size
+            self._evict_disk()
+    
+    def put(self, key: str, pdf_bytes: bytes) -> None:
+        """Store a rendered PDF in both tiers"""
+        with self._lock:
+            self._put_memory(key, pdf_bytes)
+            if self.disk_bytes > 0 and key not in self._disk and len(pdf_bytes) <= self.disk_bytes:
+                # Write-then-rename so readers never see a partial file; the
+                # unique name keeps concurrent writers of one key apart
+                tmp_path = None
+                try:
+                    tmp_path = self.temp_path(key)
+                    with open(tmp_path, "wb") as f:
+                        f.write(pdf_bytes)
+                    os.replace(tmp_path, self._path(key))
+                    self._disk[key] = len(pdf_bytes)
+                    self._disk_size += len(pdf_bytes)
+                    self._evict_disk()
+                except OSError as e:
+                    logger.error(f"Failed to write PDF cache entry {key}: {e}")
+                    if tmp_path:
+                        with contextlib.suppress(OSError):
+                            os.remove(tmp_path)
+    
+    def invalidate_kit(self, kit_id: str) -> int:
+        """Drop every cached rendition of a kit; returns entries removed"""
+        prefix = f"{kit_id}."
+        removed = 0
+        with self._lock:
+            for key in [k for k in self._memory if k.startswith(prefix)]:
+                self._memory_size -= len(self._memory.pop(key))
+                removed += 1
+            for key in [k for k in self._disk if k.startswith(prefix)]:
+                self._remove_disk(key)
+                removed += 1
+        return removed
+    
+    def clear(self) -> None:
+        """Empty both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            for key in list(self._disk):
+                self._remove_disk(key)
+    
+    def _put_memory(self, key: str, pdf_bytes: bytes) -> None:
+        if len(pdf_bytes) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = pdf_bytes
+        self._memory_size += len(pdf_bytes)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self.evictions += 1
+    
+    def _evict_disk(self) -> None:
+        while self._disk_size > self.disk_bytes and self._disk:
+            self._remove_disk(next(iter(self._disk)))
+            self.evictions += 1
+    
+    def _remove_disk(self, key: str) -> None:
+        self._disk_size -= self._disk.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Tier sizes and hit counters for monitoring"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+# Global rendered-PDF cache
+pdf_cache = PDFCache(
+    memory_bytes=settings.pdf_cache_memory_bytes,
+    disk_bytes=settings.pdf_cache_disk_bytes,
+    directory=settings.pdf_cache_dir
+)
@@ -0,0 +1,103 @@
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Iterable, Optional, Tuple, Union
+import asyncio
+import io
+import time
+import zipfile
+from fastapi.concurrency import run_in_threadpool
+
+class _ZipChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands out what was written so far"""
+    
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._offset
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+ZipContent = Union[bytes, Tuple[BinaryIO, int]]
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, ZipContent]], chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Build a ZIP archive incrementally from (filename, content) pairs
+    
+    Content is bytes or an open (file object, size) pair, which is copied in
+    `chunk_size` pieces and closed. Reads from disk run in the threadpool so a
+    large export never blocks the event loop. Output is yielded as it is
+    written, so only a chunk (plus the small central directory) is held in
+    memory. PDFs are already compressed, so entries are stored rather than
+    deflated.
+    """
+    buffer = _ZipChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            if isinstance(content, bytes):
+                archive.writestr(info, content)
+                yield buffer.drain()
+                continue
+            
+            source, info.file_size = content
+            # In-memory copies (the cache's memory tier) needn't leave the loop
+            in_memory = isinstance(source, io.BytesIO)
+            with source, archive.open(info, mode="w") as dest:
+                while True:
+                    if in_memory:
+                        chunk = source.read(chunk_size)
+                    else:
+                        chunk = await run_in_threadpool(source.read, chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    yield buffer.drain()
+            yield buffer.drain()
+    # Central directory
+    yield buffer.drain()
+
+async def as_completed_bounded(
+    items: Iterable[Any],
+    work: Callable[[Any], Awaitable[Any]],
+    window: int
+) -> AsyncIterator[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    Run `work` over items with at most `window` in flight
+    
+    Yields (item, result, error) in completion order; outstanding work is
+    cancelled if the consumer stops early (e.g. the client disconnects).
+    """
+    remaining = iter(items)
+    window = max(1, window)
+    pending = {}
+    
+    def fill():
+        while len(pending) < window:
+            item = next(remaining, None)
+            if item is None:
+                return
+            pending[asyncio.ensure_future(work(item))] = item
+    
+    fill()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                error = task.exception()
+                yield item, None if error else task.result(), error
+            fill()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,23 +1,65 @@
+import functools
+import hashlib
 import os
+import re
 import tempfile
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, Tuple, Union, BinaryIO
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from weasyprint import HTML, CSS
-from weasyprint.fonts import FontConfiguration
+from app.services.image_cache import get_image_cache, media_kit_images
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Template sources shared by every render
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'templates')
+TEMPLATE_NAME = 'media_kit.html'
+STYLESHEET_NAME = 'media_kit.css'
+STYLESHEET_LINK = re.compile(r'<link[^>]*href="' + re.escape(STYLESHEET_NAME) + r'"[^>]*>')
+
+_fingerprint_lock = threading.Lock()
+_fingerprint: Tuple[Optional[Tuple], str] = (None, "")
+
+def template_fingerprint(template_dir: str = TEMPLATE_DIR) -> str:
+    """Content hash of the template and stylesheet (recomputed when mtimes change)"""
+    global _fingerprint
+    paths = [os.path.join(template_dir, TEMPLATE_NAME), os.path.join(template_dir, STYLESHEET_NAME)]
+    mtimes = tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in paths)
+    with _fingerprint_lock:
+        if _fingerprint[0] != mtimes:
+            digest = hashlib.sha256()
+            for path in paths:
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+                digest.update(b'\0')
+            _fingerprint = (mtimes, digest.hexdigest())
+        return _fingerprint[1]
+
 class PDFGenerator:
-    """Service for generating PDF media kits from HTML templates"""
+    """
+    Service for generating PDF media kits from HTML templates
     
-    def __init__(self):
-        # Setup Jinja2 environment
-        template_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'templates')
+    Meant to be long-lived: the Jinja template is compiled, the stylesheet
+    parsed and fonts configured once, then reused for every render. Sources
+    are reloaded when their modification time changes. Jinja2 and WeasyPrint
+    are imported on construction, so only processes that render pay for them.
+    An instance is not thread-safe; use get_pdf_generator() for one per thread.
+    """
+    
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        from weasyprint.fonts import FontConfiguration
+        
+        self.template_dir = template_dir
+        self.template_path = os.path.join(template_dir, TEMPLATE_NAME)
+        self.stylesheet_path = os.path.join(template_dir, STYLESHEET_NAME)
+        
+        # Setup Jinja2 environment (reloading is handled by _ensure_fresh)
         self.jinja_env = Environment(
             loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(['html', 'xml'])
+            autoescape=select_autoescape(['html', 'xml']),
+            auto_reload=False
         )
         
         # Add custom filters
@@ -26,15 +68,77 @@ class PDFGenerator:
         
         # Font configuration for WeasyPrint
         self.font_config = FontConfiguration()
+        
+        # Downscaled copies of remote avatars and post images
+        self.image_cache = get_image_cache()
+        
+        self._template = None
+        self._stylesheet = None
+        self._stylesheet_text = ""
+        self._source_mtimes = None
+        self._ensure_fresh()
+    
+    def _current_mtimes(self) -> Tuple[Optional[int], Optional[int]]:
+        """Modification times of the template and stylesheet (None if missing)"""
+        mtimes = []
+        for path in (self.template_path, self.stylesheet_path):
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+    
+    def _ensure_fresh(self) -> None:
+        """Compile the template and parse the stylesheet if sources changed"""
+        mtimes = self._current_mtimes()
+        if mtimes == self._source_mtimes:
+            return
+        
+        # Drop Jinja's compiled copy so the new source is picked up
+        if self.jinja_env.cache is not None:
+            self.jinja_env.cache.clear()
+        self._template = self.jinja_env.get_template(TEMPLATE_NAME)
+        
+        self._stylesheet = None
+        self._stylesheet_text = ""
+        if mtimes[1] is not None:
+            from weasyprint import CSS
+            self._stylesheet = CSS(filename=self.stylesheet_path, font_config=self.font_config)
+            with open(self.stylesheet_path, encoding='utf-8') as f:
+                self._stylesheet_text = f.read()
+        
+        self._source_mtimes = mtimes
+        logger.info("Loaded media kit template and stylesheet")
+    
+    @property
+    def template_version(self) -> Tuple[Optional[int], Optional[int]]:
+        """Identifies the template/stylesheet revision currently loaded"""
+        return self._source_mtimes
     
-    def generate_media_kit_pdf(self, media_kit_data: Dict[str, Any]) -> bytes:
-        """Generate PDF from media kit data"""
+    def generate_media_kit_pdf(
+        self,
+        media_kit_data: Dict[str, Any],
+        deterministic: bool = False,
+        target: Union[str, BinaryIO, None] = None
+    ) -> Optional[bytes]:
+        """
+        Generate PDF from media kit data
+        
+        In deterministic mode the "generated" date is taken from the data
+        (when it has one) instead of the clock, so identical inputs produce
+        identical output.
+        With a `target` (path or file object, e.g. a SpooledTemporaryFile) the
+        PDF is written there instead of being returned as bytes.
+        """
         try:
+            # Fetch and downscale all remote images concurrently up front
+            image_slots = self.image_cache.prefetch(media_kit_images(media_kit_data))
+            
             # Render HTML template
-            html_content = self._render_template('media_kit.html', media_kit_data)
+            html_content = self.render_html(media_kit_data, deterministic)
             
             # Generate PDF
-            pdf_bytes = self._html_to_pdf(html_content)
+            pdf_bytes = self._html_to_pdf(html_content, image_slots, target)
             
             logger.info(f"Generated PDF for media kit: {media_kit_data.get('username', 'unknown')}")
             return pdf_bytes
@@ -43,13 +147,33 @@ class PDFGenerator:
             logger.error(f"Failed to generate PDF: {e}")
             raise
     
-    def _render_template(self, template_name: str, data: Dict[str, Any]) -> str:
+    def render_html(self, data: Dict[str, Any], deterministic: bool = False) -> str:
+        """Render the media kit template with the cached compiled template"""
+        self._ensure_fresh()
+        return self._render_template(TEMPLATE_NAME, data, deterministic)
+    
+    def render_standalone_html(self, data: Dict[str, Any]) -> str:
+        """Render the media kit as a self-contained HTML page (stylesheet inlined)"""
+        html_content = self.render_html(data, deterministic=True)
+        style = f"<style>\n{self._stylesheet_text}\n</style>"
+        return STYLESHEET_LINK.sub(lambda _: style, html_content, count=1)
+    
+    def _render_template(self, template_name: str, data: Dict[str, Any], deterministic: bool = False) -> str:
         """Render Jinja2 template with data"""
         try:
-            template = self.jinja_env.get_template(template_name)
+            if template_name == TEMPLATE_NAME and self._template is not None:
+                template = self._template
+            else:
+                template = self.jinja_env.get_template(template_name)
             
             # Add generated timestamp
-            data['generated_at'] = datetime.now()
+            if deterministic:
+                generated_at = data.get('generated_at')
+                if isinstance(generated_at, str):
+                    generated_at = datetime.fromisoformat(generated_at.replace('Z', '+00:00'))
+                data['generated_at'] = generated_at or datetime.now()
+            else:
+                data['generated_at'] = datetime.now()
             
             # Ensure required fields have defaults
             data.setdefault('full_name', data.get('username', 'Creator'))
@@ -64,26 +188,28 @@ class PDFGenerator:
             logger.error(f"Template rendering failed: {e}")
             raise
     
-    def _html_to_pdf(self, html_content: str) -> bytes:
+    def _html_to_pdf(
+        self,
+        html_content: str,
+        image_slots: Optional[Dict[str, str]] = None,
+        target: Union[str, BinaryIO, None] = None
+    ) -> Optional[bytes]:
         """Convert HTML to PDF using WeasyPrint"""
+        from weasyprint import HTML
+        
         try:
-            # Create HTML object
-            html = HTML(string=html_content)
-            
-            # Load CSS
-            css_path = os.path.join(
-                os.path.dirname(__file__), '..', '..', 'templates', 'media_kit.css'
+            # Create HTML object; remote images come from the thumbnail cache
+            html = HTML(
+                string=html_content,
+                url_fetcher=functools.partial(self.image_cache.fetch, slots=image_slots)
             )
             
-            css = None
-            if os.path.exists(css_path):
-                css = CSS(filename=css_path, font_config=self.font_config)
-            
-            # Generate PDF
+            # Generate PDF with the pre-parsed stylesheet (images are already
+            # sized for their slots, so WeasyPrint needn't re-optimize them)
             pdf_bytes = html.write_pdf(
-                stylesheets=[css] if css else None,
-                font_config=self.font_config,
-                optimize_images=True
+                target,
+                stylesheets=[self._stylesheet] if self._stylesheet else None,
+                font_config=self.font_config
             )
             
             return pdf_bytes
@@ -145,7 +271,15 @@ class PuppeteerPDFGenerator:
         # Implementation depends on deployment setup
         pass
 
+# Warm rendering engines, one per thread: template reloads and WeasyPrint's
+# font configuration aren't safe to share between the render thread and the
+# threadpool serving previews
+_local = threading.local()
+
 # Factory function to get appropriate PDF generator
 def get_pdf_generator() -> PDFGenerator:
-    """Get PDF generator instance"""
-    return PDFGenerator()
+    """Get this thread's PDF generator, creating it on first use"""
+    generator = getattr(_local, "pdf_generator", None)
+    if generator is None:
+        generator = _local.pdf_generator = PDFGenerator()
+    return generator
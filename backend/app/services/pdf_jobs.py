@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable
+from datetime import datetime
+import asyncio
+import logging
+import math
+import os
+import uuid
+from app.config import settings
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_renderer import pdf_render_pool
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when too many renders are already waiting"""
+
+class PDFJob:
+    """A background render of one media kit rendition"""
+    
+    __slots__ = ("id", "kit_id", "user_id", "is_public", "cache_key", "status", "error", "created_at", "finished_at")
+    
+    def __init__(self, kit_id: str, user_id: str, is_public: bool, cache_key: str):
+        self.id = str(uuid.uuid4())
+        self.kit_id = kit_id
+        self.user_id = user_id
+        self.is_public = is_public
+        self.cache_key = cache_key
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+class PDFJobQueue:
+    """
+    In-process background PDF rendering
+    
+    Jobs are keyed by the rendition's cache key, so asking for a render that
+    is already queued or running returns the existing job. At most
+    `concurrency` jobs render at once and at most `max_pending` may be
+    unfinished; new renders beyond that get JobQueueFull. Finished jobs are
+    kept (up to `history`) so their status can still be polled.
+    """
+    
+    def __init__(self, concurrency: int = 2, history: int = 1000, max_pending: int = 256):
+        self.concurrency = max(1, concurrency)
+        self.history = history
+        self.max_pending = max(self.concurrency, max_pending)
+        self._jobs: "OrderedDict[str, PDFJob]" = OrderedDict()
+        self._by_key: Dict[str, PDFJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.deduplicated = 0
+        self.rejected = 0
+    
+    def enqueue(
+        self,
+        kit_id: str,
+        user_id: str,
+        is_public: bool,
+        cache_key: str,
+        render_data: Dict[str, Any],
+        on_complete: Optional[Callable[[PDFJob], Awaitable[None]]] = None
+    ) -> PDFJob:
+        """Start (or join) a background render of `render_data` into the PDF cache"""
+        job = self._by_key.get(cache_key)
+        if job is not None and job.active:
+            self.deduplicated += 1
+            return job
+        if len(self._tasks) >= self.max_pending:
+            self.rejected += 1
+            raise JobQueueFull("PDF job queue is full")
+        
+        job = PDFJob(kit_id, user_id, is_public, cache_key)
+        self._jobs[job.id] = job
+        self._by_key[cache_key] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, render_data, on_complete))
+        self._trim()
+        return job
+    
+    def get(self, job_id: str) -> Optional[PDFJob]:
+        return self._jobs.get(job_id)
+    
+    async def wait(self, job: PDFJob) -> PDFJob:
+        """Wait for a job to finish (without cancelling it if the waiter is)"""
+        task = self._tasks.get(job.id)
+        if task is not None:
+            await asyncio.shield(task)
+        return job
+    
+    async def _run(
+        self,
+        job: PDFJob,
+        render_data: Dict[str, Any],
+        on_complete: Optional[Callable[[PDFJob], Awaitable[None]]]
+    ) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                if not pdf_cache.contains(job.cache_key):
+                    await self._render(job.cache_key, render_data)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"PDF job {job.id} for kit {job.kit_id} failed: {e}")
+            job.status = "failed"
+            job.error = "Rendering failed"
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.id, None)
+        
+        if job.status == "done" and on_complete is not None:
+            try:
+                await on_complete(job)
+            except Exception as e:
+                logger.warning(f"PDF job {job.id} completion hook failed: {e}")
+    
+    async def _render(self, cache_key: str, render_data: Dict[str, Any]) -> None:
+        """Render into the cache, straight to its disk tier when there is one"""
+        if not pdf_cache.disk_enabled:
+            pdf_cache.put(cache_key, await pdf_render_pool.render(render_data, deterministic=True))
+            return
+        
+        path = pdf_cache.temp_path(cache_key)
+        try:
+            await pdf_render_pool.render_to_file(render_data, path, deterministic=True)
+            pdf_cache.adopt(cache_key, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _trim(self) -> None:
+        """Forget the oldest finished jobs beyond the history limit"""
+        while len(self._jobs) > self.history:
+            oldest = next((job for job in self._jobs.values() if not job.active), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest.id]
+            if self._by_key.get(oldest.cache_key) is oldest:
+                del self._by_key[oldest.cache_key]
+    
+    def retry_after(self) -> int:
+        """Seconds a client should wait before polling again"""
+        avg_seconds = (pdf_render_pool.stats()["avg_render_ms"] or 1000) / 1000
+        return max(1, math.ceil(len(self._tasks) * avg_seconds / self.concurrency))
+    
+    def shutdown(self) -> None:
+        """Cancel renders that have not finished"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status for monitoring"""
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            **counts,
+            "concurrency": self.concurrency,
+            "max_pending": self.max_pending,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected
+        }
+
+# Global job queue; concurrency matches the render pool so jobs never overflow it
+pdf_job_queue = PDFJobQueue(
+    concurrency=max(1, settings.pdf_render_workers),
+    max_pending=settings.pdf_job_max_pending
+)
@@ -0,0 +1,146 @@
+from typing import Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from app.config import settings
+from app.services.pdf_generator import get_pdf_generator
+
+logger = logging.getLogger(__name__)
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue is at capacity"""
+
+def _warm_worker() -> None:
+    """Process pool initializer: build the warm engine once per worker"""
+    get_pdf_generator()
+
+def _ping() -> int:
+    """No-op task used to force worker processes to start"""
+    return os.getpid()
+
+def _render_in_worker(media_kit_data: Dict[str, Any], deterministic: bool, path: Optional[str] = None):
+    """Render a media kit with the worker's warm engine (to `path` if given)"""
+    if path is None:
+        return get_pdf_generator().generate_media_kit_pdf(media_kit_data, deterministic)
+    get_pdf_generator().generate_media_kit_pdf(media_kit_data, deterministic, target=path)
+    return os.path.getsize(path)
+
+class PDFRenderPool:
+    """
+    Renders media kit PDFs off the event loop
+    
+    WeasyPrint is CPU bound and holds the GIL, so renders run in a pool of
+    worker processes that each keep their own warm engine. With `workers=0`
+    renders fall back to a single thread in this process. At most
+    `workers + queue_size` renders are accepted at once; beyond that callers
+    get RenderQueueFull instead of an ever-growing backlog.
+    """
+    
+    def __init__(self, workers: int = 2, queue_size: int = 16):
+        self.workers = max(0, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor = None
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._render_seconds = 0.0
+    
+    @property
+    def capacity(self) -> int:
+        return max(1, self.workers) + self.queue_size
+    
+    def _create_executor(self):
+        if self.workers == 0:
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-render")
+        # Spawned workers don't inherit the server's event loop or sockets
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker
+        )
+    
+    async def start(self) -> None:
+        """Create the pool and wait until every worker has a warm engine"""
+        if self._executor is not None:
+            return
+        
+        self._executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        if self.workers == 0:
+            await loop.run_in_executor(self._executor, _warm_worker)
+        else:
+            await asyncio.gather(*[
+                loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)
+            ])
+        logger.info(f"PDF render pool ready ({self.workers} worker processes)")
+    
+    def shutdown(self) -> None:
+        """Stop the workers, abandoning renders that have not started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def render(self, media_kit_data: Dict[str, Any], deterministic: bool = False) -> bytes:
+        """Render a media kit PDF without blocking the event loop"""
+        return await self._submit(media_kit_data, deterministic, None)
+    
+    async def render_to_file(self, media_kit_data: Dict[str, Any], path: str, deterministic: bool = False) -> int:
+        """
+        Render a media kit PDF straight into a file; returns its size
+        
+        Only the path crosses the process boundary, never the document.
+        """
+        return await self._submit(media_kit_data, deterministic, path)
+    
+    async def _submit(self, media_kit_data: Dict[str, Any], deterministic: bool, path: Optional[str]):
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise RenderQueueFull("PDF render queue is full")
+        
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                await self.start()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, _render_in_worker, media_kit_data, deterministic, path
+            )
+            self.completed += 1
+            self._render_seconds += time.perf_counter() - started
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool for later renders
+            self.failed += 1
+            logger.error("PDF render pool broke; restarting workers")
+            self.shutdown()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and render counters for monitoring"""
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": min(self._pending, max(1, self.workers)),
+            "queued": max(0, self._pending - max(1, self.workers)),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_render_ms": round(self._render_seconds / self.completed * 1000, 2) if self.completed else 0.0
+        }
+
+# Global render pool, started in the application lifespan
+pdf_render_pool = PDFRenderPool(
+    workers=settings.pdf_render_workers,
+    queue_size=settings.pdf_render_queue_size
+)
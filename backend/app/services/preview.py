@@ -0,0 +1,145 @@
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+from functools import lru_cache
+import io
+import logging
+from app.config import settings
+from app.services.image_cache import get_image_cache
+from app.services.pdf_generator import get_pdf_generator
+from app.utils.cache import TTLCache, MISSING
+
+if TYPE_CHECKING:
+    from PIL import Image, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Link-preview card size (1.91:1, the Open Graph aspect ratio)
+PREVIEW_SIZE = (600, 315)
+
+# Colours from templates/media_kit.css
+HEADER_GRADIENT = ((59, 130, 246), (139, 92, 246))  # .header-section
+TEXT_COLOR = (31, 41, 55)
+MUTED_COLOR = (107, 114, 128)
+PANEL_COLOR = (249, 250, 251)
+ACCENT_COLOR = (59, 130, 246)
+
+# Previews are content-addressed, so entries only need expiring to free memory
+preview_cache = TTLCache(maxsize=settings.preview_cache_size, ttl=settings.preview_cache_ttl)
+
+@lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False) -> "ImageFont.ImageFont":
+    from PIL import ImageFont
+    
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:
+            return ImageFont.load_default()
+
+def _format_number(value: Any) -> str:
+    """Same K/M formatting as the template's format_number filter"""
+    value = value or 0
+    if value >= 1000000:
+        return f"{value/1000000:.1f}M"
+    elif value >= 1000:
+        return f"{value/1000:.1f}K"
+    return str(value)
+
+class MediaKitPreviewRenderer:
+    """
+    Cheap previews of a media kit for the dashboard and link cards
+    
+    `html` renders media_kit.html with media_kit.css inlined; `png` draws a
+    small summary card with Pillow. Neither touches WeasyPrint's layout
+    engine, which is what makes a full PDF expensive.
+    """
+    
+    def html(self, data: Dict[str, Any]) -> bytes:
+        return get_pdf_generator().render_standalone_html(dict(data)).encode("utf-8")
+    
+    def png(self, data: Dict[str, Any]) -> bytes:
+        from PIL import Image, ImageDraw
+        
+        width, height = PREVIEW_SIZE
+        card = Image.new("RGB", PREVIEW_SIZE, (255, 255, 255))
+        
+        # Header band with the template's gradient
+        band_height = 170
+        mask = Image.linear_gradient("L").rotate(90).resize((width, band_height))
+        band = Image.composite(
+            Image.new("RGB", (width, band_height), HEADER_GRADIENT[1]),
+            Image.new("RGB", (width, band_height), HEADER_GRADIENT[0]),
+            mask
+        )
+        card.paste(band, (0, 0))
+        draw = ImageDraw.Draw(card)
+        
+        # Avatar (from the thumbnail cache) or initial
+        name = data.get("full_name") or data.get("username") or "Creator"
+        avatar_box = (32, 41, 120, 129)
+        avatar = self._avatar(data.get("avatar_url"), avatar_box[2] - avatar_box[0])
+        if avatar is not None:
+            circle = Image.new("L", avatar.size, 0)
+            ImageDraw.Draw(circle).ellipse((0, 0) + avatar.size, fill=255)
+            card.paste(avatar, avatar_box[:2], circle)
+        else:
+            draw.ellipse(avatar_box, fill=(118, 111, 248))
+            draw.text(
+                ((avatar_box[0] + avatar_box[2]) / 2, (avatar_box[1] + avatar_box[3]) / 2),
+                name[0].upper(), font=_font(36, bold=True), fill="white", anchor="mm"
+            )
+        
+        draw.text((140, 48), name[:28], font=_font(28, bold=True), fill="white")
+        draw.text((140, 88), f"@{data.get('handle', '')}"[:32], font=_font(18), fill=(235, 235, 255))
+        draw.text((140, 116), str(data.get("platform", "")).title(), font=_font(14, bold=True), fill="white")
+        
+        draw.text((width - 32, 60), _format_number(data.get("followers")), font=_font(34, bold=True), fill="white", anchor="ra")
+        draw.text((width - 32, 104), "Followers", font=_font(14), fill=(235, 235, 255), anchor="ra")
+        
+        # Metric panels
+        metrics = [
+            (f"{float(data.get('engagement_rate') or 0):.1f}%", "Engagement Rate"),
+            (_format_number(data.get("avg_likes")), "Avg Likes"),
+            (_format_number(data.get("avg_comments")), "Avg Comments")
+        ]
+        gap = 16
+        panel_width = (width - 64 - gap * (len(metrics) - 1)) / len(metrics)
+        for i, (value, label) in enumerate(metrics):
+            left = 32 + i * (panel_width + gap)
+            draw.rounded_rectangle((left, 195, left + panel_width, height - 32), radius=10, fill=PANEL_COLOR)
+            center = left + panel_width / 2
+            draw.text((center, 225), value, font=_font(26, bold=True), fill=ACCENT_COLOR if i == 0 else TEXT_COLOR, anchor="mt")
+            draw.text((center, 262), label, font=_font(13), fill=MUTED_COLOR, anchor="mt")
+        
+        buffer = io.BytesIO()
+        card.save(buffer, "PNG", optimize=True)
+        return buffer.getvalue()
+    
+    def _avatar(self, url: Optional[str], size: int) -> Optional["Image.Image"]:
+        """Avatar thumbnail from the image cache, or None"""
+        from PIL import Image, ImageOps
+        
+        if not url:
+            return None
+        try:
+            image_cache = get_image_cache()
+            fetched = image_cache.fetch(url, image_cache.prefetch([(url, "avatar")]))
+            if fetched.get("mime_type") != "image/jpeg":
+                return None
+            with Image.open(io.BytesIO(fetched["string"])) as image:
+                return ImageOps.fit(image.convert("RGB"), (size, size), Image.LANCZOS)
+        except Exception as e:
+            logger.warning(f"Preview avatar unavailable for {url}: {e}")
+            return None
+    
+    def render(self, kind: str, cache_key: str, data: Dict[str, Any]) -> Tuple[bytes, str]:
+        """Cached preview bytes and media type (kind is html or png)"""
+        key = (kind, cache_key)
+        content = preview_cache.get(key)
+        if content is MISSING:
+            content = self.html(data) if kind == "html" else self.png(data)
+            preview_cache.set(key, content)
+        return content, "text/html" if kind == "html" else "image/png"
+
+preview_renderer = MediaKitPreviewRenderer()
@@ -0,0 +1,117 @@
+from typing import List
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from app.models.media_kit import (
+    EngagementTimeSeriesResponse,
+    RollingEngagementPoint,
+    PostingCadence,
+    SlotPerformance,
+    EngagementTrend
+)
+from app.models.post_series import PostSeries
+
+_US_PER_HOUR = 3600 * 1000000
+_US_PER_DAY = 24 * _US_PER_HOUR
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+class EngagementTimeSeriesAnalyzer:
+    """Service for time-based engagement analytics over post history"""
+    
+    # Relative change over 30 days that counts as growing/declining
+    TREND_THRESHOLD = 0.05
+    
+    def __init__(self, window_days: int = 30, max_points: int = 100):
+        self.window_days = window_days
+        self.max_points = max_points
+    
+    def analyze(self, series: PostSeries, followers: int) -> EngagementTimeSeriesResponse:
+        """Compute rolling rate, cadence, slot performance and trend"""
+        # Sort once; everything below works on the sorted columns
+        order = np.argsort(series.timestamps, kind="stable")
+        ts = series.timestamps[order].astype(np.int64)
+        rates = series.engagement[order] / followers * 100 if followers > 0 else np.zeros(len(ts))
+        
+        return EngagementTimeSeriesResponse(
+            window_days=self.window_days,
+            rolling=self._rolling(ts, rates),
+            cadence=self._cadence(ts),
+            day_of_week=self._slots((ts // _US_PER_DAY + 3) % 7, rates, 7),
+            hour_of_day=self._slots((ts // _US_PER_HOUR) % 24, rates, 24),
+            trend=self._trend(ts, rates)
+        )
+    
+    def _rolling(self, ts: np.ndarray, rates: np.ndarray) -> List[RollingEngagementPoint]:
+        """Trailing-window mean engagement rate evaluated at each post"""
+        if len(ts) == 0:
+            return []
+        
+        # Window start for each post via binary search on the sorted timestamps
+        starts = np.searchsorted(ts, ts - self.window_days * _US_PER_DAY, side="left")
+        ends = np.arange(1, len(ts) + 1)
+        cumulative = np.concatenate(([0.0], np.cumsum(rates)))
+        window_counts = ends - starts
+        rolling = (cumulative[ends] - cumulative[starts]) / window_counts
+        
+        # Downsample evenly, always keeping the latest point
+        points = np.unique(np.linspace(0, len(ts) - 1, min(len(ts), self.max_points)).astype(np.int64))
+        return [
+            RollingEngagementPoint(
+                date=_EPOCH + timedelta(microseconds=int(ts[i])),
+                engagement_rate=round(float(rolling[i]), 2),
+                posts_in_window=int(window_counts[i])
+            )
+            for i in points
+        ]
+    
+    def _cadence(self, ts: np.ndarray) -> PostingCadence:
+        """Posting frequency and gaps between posts"""
+        if len(ts) < 2:
+            return PostingCadence(posts_per_week=float(len(ts)), active_days=0.0)
+        
+        intervals = np.diff(ts)
+        active_days = (ts[-1] - ts[0]) / _US_PER_DAY
+        return PostingCadence(
+            posts_per_week=round(float(len(ts) / max(active_days, 1.0) * 7), 2),
+            median_interval_hours=round(float(np.median(intervals)) / _US_PER_HOUR, 2),
+            longest_gap_days=round(float(intervals.max()) / _US_PER_DAY, 2),
+            active_days=round(float(active_days), 2)
+        )
+    
+    def _slots(self, slots: np.ndarray, rates: np.ndarray, size: int) -> List[SlotPerformance]:
+        """Average engagement rate per weekday/hour bucket (UTC)"""
+        counts = np.bincount(slots, minlength=size)
+        totals = np.bincount(slots, weights=rates, minlength=size)
+        return [
+            SlotPerformance(
+                slot=slot,
+                posts=int(counts[slot]),
+                avg_engagement_rate=round(float(totals[slot] / counts[slot]), 2)
+            )
+            for slot in np.flatnonzero(counts).tolist()
+        ]
+    
+    def _trend(self, ts: np.ndarray, rates: np.ndarray) -> EngagementTrend:
+        """Least-squares slope of per-post engagement rate over time"""
+        slope = 0.0
+        if len(ts) >= 2:
+            days = (ts - ts[0]) / _US_PER_DAY
+            x = days - days.mean()
+            variance = float((x * x).sum())
+            if variance > 0:
+                slope = float((x * (rates - rates.mean())).sum()) / variance
+        
+        change = slope * 30
+        mean_rate = float(rates.mean()) if len(rates) else 0.0
+        relative = change / mean_rate if mean_rate > 0 else 0.0
+        if relative > self.TREND_THRESHOLD:
+            direction = "growing"
+        elif relative < -self.TREND_THRESHOLD:
+            direction = "declining"
+        else:
+            direction = "stable"
+        
+        return EngagementTrend(
+            slope_per_day=round(slope, 4),
+            change_per_30_days=round(change, 2),
+            direction=direction
+        )
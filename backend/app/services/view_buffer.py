@@ -0,0 +1,228 @@
+from collections import Counter
+from typing import Dict, Any, List, Optional
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+from app.config import settings
+from app.utils.cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+# Attempts at the final flush before unflushed views are spilled to disk
+SHUTDOWN_FLUSH_ATTEMPTS = 3
+
+def _clean_ip(value: Any) -> Optional[str]:
+    """A valid IP address or None (one bad INET value would fail a whole batch)"""
+    if not value:
+        return None
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        return None
+
+class ViewBuffer:
+    """
+    Coalesces media kit views into periodic bulk writes
+    
+    Views are queued in memory and written every `flush_interval` seconds (or
+    once `batch_size` are waiting) with a single `record_media_kit_views`
+    call, which inserts them in bulk and bumps each kit's counter once. View
+    counts are estimated from the last known count plus buffered views, so
+    tracking a view never reads the database. On shutdown the buffer is
+    flushed, and anything that still can't be written is saved to
+    `spill_path` and replayed on the next start. The spill file must be on
+    storage that outlives the instance; without one, those views are lost.
+    """
+    
+    def __init__(
+        self,
+        flush_interval: float = 2.0,
+        batch_size: int = 500,
+        max_pending: int = 50000,
+        spill_path: str = ""
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.spill_path = spill_path
+        self._db_ops = None
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_counts: Counter = Counter()
+        self._flushing_counts: Counter = Counter()
+        # Last view count the database reported for each kit
+        self._counts = TTLCache(maxsize=10000, ttl=3600)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.spilled = 0
+    
+    def start(self, db_ops) -> None:
+        """Start periodic flushing to `db_ops`, replaying views spilled by a previous shutdown"""
+        if self._db_ops is None:
+            self._db_ops = db_ops
+        if self._task is None:
+            if not self.spill_path:
+                logger.warning("VIEW_SPILL_PATH is not set; views unflushed at shutdown will be lost")
+            self._restore()
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run(self._stopping))
+    
+    def record(self, db_ops, kit_id: str, known_count: int, viewer_data: Dict[str, Any]) -> int:
+        """Queue a view of a kit and return its estimated view count"""
+        self.start(db_ops)
+        self._pending.append({
+            "media_kit_id": kit_id,
+            **viewer_data,
+            "viewer_ip": _clean_ip(viewer_data.get("viewer_ip"))
+        })
+        self._pending_counts[kit_id] += 1
+        self.recorded += 1
+        if len(self._pending) >= self.batch_size and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.create_task(self.flush())
+        return self.estimate(kit_id, known_count)
+    
+    def estimate(self, kit_id: str, known_count: int = 0) -> int:
+        """Stored count (or the caller's, if newer) plus views not yet written"""
+        stored = self._counts.get(kit_id)
+        base = known_count if stored is MISSING else max(known_count, stored)
+        return base + self._pending_counts[kit_id] + self._flushing_counts[kit_id]
+    
+    async def _run(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            try:
+                await asyncio.wait_for(stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+    
+    async def flush(self) -> int:
+        """Write buffered views in one batch; returns how many were written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending or self._db_ops is None:
+                return 0
+            batch, self._pending = self._pending, []
+            self._flushing_counts, self._pending_counts = self._pending_counts, Counter()
+            try:
+                counts = await self._db_ops.record_media_kit_views(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} media kit views: {e}")
+                self.failed_flushes += 1
+                self._requeue(batch)
+                return 0
+            except BaseException:
+                # Cancelled mid-write: keep the views rather than lose the batch
+                self._requeue(batch)
+                raise
+            finally:
+                self._flushing_counts = Counter()
+            
+            for kit_id, count in counts.items():
+                self._counts.set(kit_id, count)
+            self.flushes += 1
+            self.flushed_views += len(batch)
+            return len(batch)
+    
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        """Put a batch that wasn't written back (oldest first) for the next flush, within the bound"""
+        self._pending = batch + self._pending
+        self._pending_counts.update(self._flushing_counts)
+        self._trim()
+    
+    def _trim(self) -> None:
+        """Drop the oldest views beyond max_pending"""
+        excess = len(self._pending) - self.max_pending
+        if excess <= 0:
+            return
+        for view in self._pending[:excess]:
+            self._pending_counts[view["media_kit_id"]] -= 1
+        del self._pending[:excess]
+        self.dropped += excess
+        logger.warning(f"View buffer full; dropped {excess} views")
+    
+    async def close(self) -> None:
+        """Stop flushing periodically, then write (or spill) everything buffered"""
+        # Let a periodic or early flush already writing finish, not cancel it
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._early_flush is not None:
+            await self._early_flush
+            self._early_flush = None
+        for attempt in range(SHUTDOWN_FLUSH_ATTEMPTS):
+            await self.flush()
+            if not self._pending:
+                return
+            await asyncio.sleep(0.5 * 2 ** attempt)
+        self._spill()
+    
+    def _spill(self) -> None:
+        """Append unflushed views to the spill file"""
+        if not self._pending:
+            return
+        if not self.spill_path:
+            logger.error(f"Lost {len(self._pending)} unflushed media kit views (VIEW_SPILL_PATH is not set)")
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for view in self._pending:
+                    f.write(json.dumps(view, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.spilled += len(self._pending)
+            logger.warning(f"Saved {len(self._pending)} unflushed media kit views to {self.spill_path}")
+            self._pending = []
+            self._pending_counts = Counter()
+        except OSError as e:
+            logger.error(f"Failed to save {len(self._pending)} unflushed media kit views: {e}")
+    
+    def _restore(self) -> None:
+        """Queue views spilled by a previous shutdown"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        # Claim the file first so only one worker process replays it
+        claimed = f"{self.spill_path}.{os.getpid()}"
+        try:
+            os.rename(self.spill_path, claimed)
+        except OSError:
+            return
+        try:
+            with open(claimed, encoding="utf-8") as f:
+                views = [json.loads(line) for line in f if line.strip()]
+            os.remove(claimed)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to restore spilled media kit views: {e}")
+            return
+        self._pending = views + self._pending
+        self._pending_counts.update(view["media_kit_id"] for view in views)
+        logger.info(f"Restored {len(views)} media kit views saved at last shutdown")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Buffer size and flush counters for monitoring"""
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+            "avg_batch": round(self.flushed_views / self.flushes, 1) if self.flushes else None,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "spilled": self.spilled
+        }
+
+# Global view buffer; flushing starts with the first view (or the lifespan)
+view_buffer = ViewBuffer(
+    flush_interval=settings.view_flush_interval,
+    batch_size=settings.view_flush_batch_size,
+    max_pending=settings.view_buffer_max,
+    spill_path=settings.view_spill_path
+)
@@ -1,7 +1,5 @@
-from jose import JWTError, jwt
 from fastapi import HTTPException, status
 from app.config import settings
-import requests
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +17,9 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid
     """
+    # Imported on first use to keep application startup fast
+    from jose import JWTError, jwt
+    
     try:
         # For Supabase tokens, we need to verify against Supabase's public key
         # This is a simplified version - in production, you should fetch the public key
@@ -63,6 +64,8 @@ def verify_supabase_token_with_api(token: str) -> dict:
     This method makes an API call to Supabase to verify the token,
     which is more secure but adds latency.
     """
+    import requests
+    
     try:
         headers = {
             "Authorization": f"Bearer {token}",
@@ -0,0 +1,45 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import binascii
+import json
+import uuid
+
+# Position in a newest-first listing: (created_at, id) of the last row seen
+Keyset = Tuple[str, str]
+
+class InvalidCursor(Exception):
+    """Raised when a cursor token can't be decoded"""
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque token resuming a listing after `row`"""
+    payload = json.dumps([str(row["created_at"]), str(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> Keyset:
+    """The (created_at, id) keyset a token from encode_cursor points at"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise InvalidCursor(token) from e
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise InvalidCursor(token)
+    # Both values end up in a query filter, so they must be a real timestamp and id
+    try:
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        row_id = str(uuid.UUID(row_id))
+    except ValueError as e:
+        raise InvalidCursor(token) from e
+    return created_at, row_id
+
+def paginate(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Split rows fetched with `limit + 1` into the page and the next cursor
+    
+    The extra row only signals that another page exists; the cursor points
+    at the last row returned, not at it.
+    """
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,221 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import time
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# (column, operator, value), e.g. ("id", "eq", kit_id) or ("id", "in", [a, b])
+Filter = Tuple[str, str, Any]
+
+class PostgrestError(Exception):
+    """Non-2xx response from PostgREST"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+def _quote(value: Any) -> str:
+    """Encode a filter value the way PostgREST expects"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    return str(value)
+
+def _filter_params(filters: Iterable[Filter]) -> List[Tuple[str, str]]:
+    params = []
+    for column, operator, value in filters:
+        if operator == "in":
+            # Quote list members so commas and parentheses in values are safe
+            members = ",".join('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in value)
+            params.append((column, f"in.({members})"))
+        else:
+            params.append((column, f"{operator}.{_quote(value)}"))
+    return params
+
+class PostgrestClient:
+    """
+    Asynchronous PostgREST client over a pooled httpx connection pool
+    
+    Requests share up to `pool_size` keep-alive connections (multiplexed over
+    HTTP/2 when the h2 package is installed), so queries never block the
+    event loop. httpx is imported and the pool opened on first use; call
+    `aclose()` on shutdown.
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        pool_size: int = 20,
+        keepalive: int = 10,
+        timeout: float = 10.0,
+        http2: bool = True
+    ):
+        self.base_url = f"{url.rstrip('/')}/rest/v1"
+        self.key = key
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.http2 = http2
+        self._client: Optional["httpx.AsyncClient"] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self._request_seconds = 0.0
+    
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            if self.http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("h2 is not installed; PostgREST pool falls back to HTTP/1.1 keep-alive")
+                    self.http2 = False
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.keepalive),
+                timeout=self.timeout,
+                headers={"apikey": self.key, "Authorization": f"Bearer {self.key}"}
+            )
+        return self._client
+    
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[List[Tuple[str, str]]] = None,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> "httpx.Response":
+        """Send one request through the pool, raising PostgrestError on failure"""
+        import httpx
+        
+        client = self._get_client()
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, params=params, json=json, headers=headers)
+        except httpx.TimeoutException:
+            self.timeouts += 1
+            self.errors += 1
+            raise
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.requests += 1
+            self._request_seconds += time.perf_counter() - started
+        
+        if response.status_code >= 400:
+            self.errors += 1
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise PostgrestError(response.status_code, message)
+        return response
+    
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Iterable[Filter] = (),
+        order: Optional[str] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        single: bool = False,
+        any_of: Optional[str] = None
+    ) -> Any:
+        """
+        Rows matching all filters
+        
+        `order` may list several comma-separated columns, all sorted in the
+        same direction. `any_of` is a PostgREST `or` condition list (without
+        the parentheses). With `single` the one matching row is returned (None
+        unless exactly one row matches), mirroring supabase's `.single()`.
+        """
+        params = [("select", columns)] + _filter_params(filters)
+        if any_of:
+            params.append(("or", f"({any_of})"))
+        if order:
+            direction = 'desc' if desc else 'asc'
+            params.append(("order", ",".join(f"{column}.{direction}" for column in order.split(","))))
+        if limit is not None:
+            params.append(("limit", str(limit)))
+        headers = {"Accept": "application/vnd.pgrst.object+json"} if single else None
+        try:
+            response = await self.request("GET", f"/{table}", params=params, headers=headers)
+        except PostgrestError as e:
+            if single and e.status_code == 406:
+                return None
+            raise
+        return response.json()
+    
+    async def insert(self, table: str, rows: Any) -> List[Dict[str, Any]]:
+        """Insert one row (dict) or many (list) and return the stored rows"""
+        response = await self.request(
+            "POST", f"/{table}", json=rows, headers={"Prefer": "return=representation"}
+        )
+        return response.json()
+    
+    async def upsert(self, table: str, rows: Any, on_conflict: str) -> List[Dict[str, Any]]:
+        """Insert rows, updating those that collide on the `on_conflict` columns"""
+        response = await self.request(
+            "POST", f"/{table}", params=[("on_conflict", on_conflict)], json=rows,
+            headers={"Prefer": "resolution=merge-duplicates,return=representation"}
+        )
+        return response.json()
+    
+    async def update(self, table: str, values: Dict[str, Any], filters: Iterable[Filter]) -> List[Dict[str, Any]]:
+        """Update matching rows and return them"""
+        response = await self.request(
+            "PATCH", f"/{table}", params=_filter_params(filters), json=values,
+            headers={"Prefer": "return=representation"}
+        )
+        return response.json()
+    
+    async def rpc(self, function: str, params: Dict[str, Any]) -> Any:
+        """Call a database function"""
+        response = await self.request("POST", f"/rpc/{function}", json=params)
+        return response.json() if response.content else None
+    
+    async def health_check(self) -> bool:
+        """Check if database connection is healthy"""
+        try:
+            await self.select("profiles", "id", limit=1)
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+    
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration and request counters for monitoring"""
+        return {
+            "http2": self.http2,
+            "pool_size": self.pool_size,
+            "keepalive": self.keepalive,
+            "timeout_s": self.timeout,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_request_ms": round(self._request_seconds / self.requests * 1000, 2) if self.requests else None
+        }
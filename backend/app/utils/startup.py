@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+class ImportTimer:
+    """
+    Records how long each module takes to import while active
+    
+    Wraps `builtins.__import__` between `start()` and `stop()` and times every
+    module loaded for the first time, both cumulative (including the modules
+    it imports) and self time. Only the thread that called `start()` is
+    measured.
+    """
+    
+    def __init__(self):
+        self._original = None
+        self._thread: Optional[int] = None
+        self._stack: List[List[float]] = []
+        self._started = 0.0
+        self.total_seconds = 0.0
+        self.modules: Dict[str, Dict[str, float]] = {}
+    
+    def start(self) -> None:
+        if self._original is not None:
+            return
+        self._original = builtins.__import__
+        self._thread = threading.get_ident()
+        self._started = time.perf_counter()
+        builtins.__import__ = self._import
+    
+    def stop(self) -> None:
+        if self._original is None:
+            return
+        builtins.__import__ = self._original
+        self._original = None
+        self.total_seconds += time.perf_counter() - self._started
+    
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original or builtins.__import__
+        if threading.get_ident() != self._thread:
+            return original(name, globals, locals, fromlist, level)
+        
+        try:
+            if level:
+                package = (globals or {}).get("__package__")
+                name_abs = importlib.util.resolve_name("." * level + name, package)
+            else:
+                name_abs = name
+        except (ImportError, ValueError):
+            name_abs = None
+        if name_abs is None or name_abs in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        
+        # Time spent in nested first-time imports, subtracted for self time
+        frame = [0.0]
+        self._stack.append(frame)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            if name_abs in sys.modules:
+                self.modules[name_abs] = {"cumulative": elapsed, "self": elapsed - frame[0]}
+    
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """Total import time and the slowest modules by self time"""
+        slowest = sorted(self.modules.items(), key=lambda item: item[1]["self"], reverse=True)[:top]
+        return {
+            "import_ms": round(self.total_seconds * 1000, 1),
+            "modules_imported": len(self.modules),
+            "slowest": [
+                {
+                    "module": module,
+                    "self_ms": round(timing["self"] * 1000, 1),
+                    "cumulative_ms": round(timing["cumulative"] * 1000, 1)
+                }
+                for module, timing in slowest
+            ]
+        }
+    
+    def summary(self, top: int = 5) -> str:
+        """One-line version of `report` for the startup log"""
+        report = self.report(top)
+        slowest = ", ".join(f"{entry['module']} {entry['self_ms']}ms" for entry in report["slowest"])
+        return f"Imported {report['modules_imported']} modules in {report['import_ms']}ms (slowest: {slowest})"
+
+# Times app.main's imports; started before anything else is imported
+import_timer = ImportTimer()
@@ -0,0 +1,49 @@
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header selects no bytes of the resource"""
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header into inclusive (start, end)
+    
+    Returns None when the whole resource should be sent (no header, a
+    malformed header, or multiple ranges, which RFC 9110 allows us to ignore).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix == 0:
+                raise RangeNotSatisfiable(header)
+            start = max(0, size - suffix)
+            end = size - 1
+    except ValueError:
+        return None
+    
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if start < 0 or start > end:
+        return None
+    return start, min(end, size - 1)
+
+def iter_file_range(f: BinaryIO, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file in chunks, then close it"""
+    try:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
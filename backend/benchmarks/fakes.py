@@ -0,0 +1,228 @@
+# In-memory stand-ins used to exercise the API without Supabase
+from typing import Dict, Any, List
+from datetime import datetime
+import uuid
+from app.database import DatabaseOperations
+
+class FakeDatabaseOperations(DatabaseOperations):
+    """DatabaseOperations backed by plain dicts (no network, no client)"""
+    
+    def __init__(self):
+        super().__init__(client=None)
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        self.social_accounts: Dict[str, Dict[str, Any]] = {}
+        self.analyses: Dict[str, Dict[str, Any]] = {}
+        self.aggregates: Dict[str, Dict[str, Any]] = {}
+        self.media_kits: Dict[str, Dict[str, Any]] = {}
+        self.views: List[Dict[str, Any]] = []
+    
+    # Profile operations
+    async def get_profile(self, user_id: str):
+        return self.profiles.get(user_id)
+    
+    async def create_profile(self, profile_data: dict):
+        self.profiles[profile_data["id"]] = dict(profile_data)
+        return self.profiles[profile_data["id"]]
+    
+    async def update_profile(self, user_id: str, profile_data: dict):
+        self.profiles.setdefault(user_id, {"id": user_id}).update(profile_data)
+        self._profile_changed(user_id, profile_data)
+        return self.profiles[user_id]
+    
+    # Social accounts operations
+    async def get_social_accounts(self, user_id: str):
+        return [a for a in self.social_accounts.values() if a["user_id"] == user_id]
+    
+    async def get_social_account(self, user_id: str, platform: str, handle: str):
+        for account in self.social_accounts.values():
+            if (account["user_id"], account["platform"], account["handle"]) == (user_id, platform, handle):
+                return account
+        return None
+    
+    async def create_social_account(self, account_data: dict):
+        account = dict(account_data)
+        account.setdefault("id", str(uuid.uuid4()))
+        self.social_accounts[account["id"]] = account
+        return account
+    
+    async def _upsert_social_account(self, account_data: dict):
+        account = await self.get_social_account(
+            account_data["user_id"], account_data["platform"], account_data["handle"]
+        )
+        if account is None:
+            return await self.create_social_account(account_data)
+        account.update(account_data)
+        return account
+    
+    # Engagement analysis operations
+    async def create_engagement_analysis(self, analysis_data: dict):
+        self.analyses[analysis_data["id"]] = dict(analysis_data)
+        return self.analyses[analysis_data["id"]]
+    
+    async def create_engagement_analyses(self, analyses: list):
+        return [await self.create_engagement_analysis(analysis) for analysis in analyses]
+    
+    async def get_engagement_analysis(self, analysis_id: str):
+        return self.analyses.get(analysis_id)
+    
+    async def _list_user_rows(self, table: str, columns: str, user_id: str, limit: int, after=None):
+        rows = self.analyses if table == "engagement_analyses" else self.media_kits
+        keys = lambda row: (str(row["created_at"]), str(row["id"]))
+        matching = [row for row in rows.values() if row["user_id"] == user_id and (not after or keys(row) < tuple(after))]
+        matching.sort(key=keys, reverse=True)
+        if columns != "*":
+            return [{column: row.get(column) for column in columns.split(",")} for row in matching[:limit]]
+        return [dict(row) for row in matching[:limit]]
+    
+    async def merge_engagement_aggregate(self, social_account_id: str, user_id: str, posts: list):
+        stored = self.aggregates.setdefault(social_account_id, {
+            "social_account_id": social_account_id, "user_id": user_id, "post_count": 0,
+            "total_likes": 0, "total_comments": 0, "engagement_sum_squares": 0,
+            "best_engagement": 0, "best_post": None, "last_post_date": None
+        })
+        # Same high-water mark rule as the SQL function
+        mark = stored["last_post_date"]
+        for post in posts:
+            post_date = datetime.fromisoformat(post["post_date"].replace("Z", "+00:00"))
+            if mark is not None and post_date <= mark:
+                continue
+            engagement = post["likes"] + post["comments"]
+            stored["post_count"] += 1
+            stored["total_likes"] += post["likes"]
+            stored["total_comments"] += post["comments"]
+            stored["engagement_sum_squares"] += engagement * engagement
+            if engagement > stored["best_engagement"]:
+                stored["best_engagement"] = engagement
+                stored["best_post"] = post
+            if stored["last_post_date"] is None or post_date > stored["last_post_date"]:
+                stored["last_post_date"] = post_date
+        return dict(stored)
+    
+    async def get_engagement_benchmarks(self):
+        return []
+    
+    # Media kit operations
+    async def create_media_kit(self, kit_data: dict):
+        self.media_kits[kit_data["id"]] = dict(kit_data)
+        self._media_kit_visibility_changed(kit_data.get("user_id"))
+        return self.media_kits[kit_data["id"]]
+    
+    async def _fetch_media_kit_by_username(self, username: str):
+        for kit in self.media_kits.values():
+            profile = self.profiles.get(kit["user_id"], {})
+            if profile.get("username") == username and kit.get("is_public"):
+                account = self.social_accounts.get(kit.get("social_account_id"), {})
+                return {
+                    **kit,
+                    "platform": account.get("platform", "instagram"),
+                    "handle": account.get("handle", username),
+                    "followers": account.get("followers", 0),
+                    "profiles": {
+                        "username": profile.get("username"),
+                        "full_name": profile.get("full_name"),
+                        "avatar_url": profile.get("avatar_url")
+                    }
+                }
+        return None
+    
+    async def get_media_kit(self, kit_id: str):
+        return self.media_kits.get(kit_id)
+    
+    async def get_media_kits(self, kit_ids: list):
+        return [self.media_kits[kit_id] for kit_id in kit_ids if kit_id in self.media_kits]
+    
+    async def get_user_media_kits(self, user_id: str):
+        kits = [kit for kit in self.media_kits.values() if kit["user_id"] == user_id]
+        return sorted(kits, key=lambda kit: kit["created_at"], reverse=True)
+    
+    async def get_media_kit_bundles(self, kit_ids: list):
+        bundles = []
+        for kit_id in kit_ids:
+            kit = self.media_kits.get(kit_id)
+            if kit is None:
+                continue
+            analysis = self.analyses.get(kit.get("engagement_analysis_id"))
+            if analysis is None and not kit.get("engagement_analysis_id"):
+                analyses = [a for a in self.analyses.values() if a.get("social_account_id") == kit.get("social_account_id")]
+                analysis = max(analyses, key=lambda a: a["created_at"], default=None)
+            bundles.append({
+                "media_kit": kit,
+                "profile": self.profiles.get(kit["user_id"]),
+                "social_account": self.social_accounts.get(kit.get("social_account_id")),
+                "engagement_analysis": analysis
+            })
+        return bundles
+    
+    async def update_media_kit(self, kit_id: str, kit_data: dict):
+        if kit_id not in self.media_kits:
+            return None
+        # Emulates the update_media_kits_updated_at trigger
+        self.media_kits[kit_id].update(kit_data, updated_at=datetime.utcnow().isoformat())
+        self._media_kit_changed(kit_id, kit_data, self.media_kits[kit_id].get("user_id"))
+        return self.media_kits[kit_id]
+    
+    # Media kit views operations
+    async def track_media_kit_view(self, kit_id: str, viewer_data: dict):
+        counts = await self.record_media_kit_views([{"media_kit_id": kit_id, **viewer_data}])
+        return counts.get(kit_id, 0)
+    
+    async def record_media_kit_views(self, views: list):
+        counts = {}
+        for view in views:
+            kit = self.media_kits.get(view["media_kit_id"])
+            if kit is None:
+                continue
+            self.views.append(dict(view))
+            kit["view_count"] = kit.get("view_count", 0) + 1
+            kit["updated_at"] = datetime.utcnow().isoformat()
+            counts[kit["id"]] = kit["view_count"]
+        return counts
+
+def seed_media_kit(db: FakeDatabaseOperations, username: str, top_posts: int = 3) -> Dict[str, Any]:
+    """Create a profile, social account and public media kit for benchmarks"""
+    now = datetime.utcnow().isoformat()
+    user_id = str(uuid.uuid4())
+    account_id = str(uuid.uuid4())
+    kit_id = str(uuid.uuid4())
+    
+    db.profiles[user_id] = {
+        "id": user_id,
+        "username": username,
+        "full_name": f"{username.title()} Creator",
+        "avatar_url": None,
+        "contact_email": f"{username}@example.com",
+        "created_at": now,
+        "updated_at": now
+    }
+    db.social_accounts[account_id] = {
+        "id": account_id,
+        "user_id": user_id,
+        "platform": "instagram",
+        "handle": username,
+        "followers": 25000,
+        "is_primary": True
+    }
+    db.media_kits[kit_id] = {
+        "id": kit_id,
+        "user_id": user_id,
+        "social_account_id": account_id,
+        "title": f"{username}'s Media Kit",
+        "bio": "Travel and lifestyle creator sharing everyday adventures.",
+        "handle": username,
+        "platform": "instagram",
+        "followers": 25000,
+        "engagement_rate": 4.2,
+        "avg_likes": 1000,
+        "avg_comments": 50,
+        "top_posts": [
+            {"likes": 1200 + i, "comments": 40 + i, "caption": f"Post number {i}", "image_url": None}
+            for i in range(top_posts)
+        ],
+        "contact_info": {"email": f"{username}@example.com", "platform_handle": username},
+        "branding": {},
+        "is_public": True,
+        "view_count": 0,
+        "created_at": now,
+        "updated_at": now
+    }
+    return db.media_kits[kit_id]
@@ -0,0 +1,348 @@
+# Performance benchmark suite for the Ifluencesa backend
+#
+# Usage (from backend/):
+#   python -m benchmarks.run --output results.json
+#   python -m benchmarks.run --output new.json --compare results.json
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Settings require Supabase credentials; benchmarks never talk to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault(
+    "SUPABASE_SERVICE_KEY",
+    "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark"
+)
+# Keep benchmark renders out of the real PDF cache directory
+os.environ.setdefault("PDF_CACHE_DIR", tempfile.mkdtemp(prefix="ifluencesa-bench-"))
+
+from app.models.media_kit import EngagementAnalysisRequest
+from app.services.engagement import EngagementAnalyzer, analysis_cache
+
+POST_COUNTS = [10, 100, 1000, 10000, 50000]
+BATCH_SHAPES = [(100, 10), (1000, 10), (100, 500)]
+KIT_SIZES = [0, 3, 10]
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    iterations: int,
+    warmup: int = 2,
+    is_async: bool = False
+) -> Dict[str, Any]:
+    """Time `fn` and report latency percentiles, throughput and peak memory"""
+    loop = asyncio.get_event_loop() if is_async else None
+    
+    def call():
+        return loop.run_until_complete(fn()) if is_async else fn()
+    
+    for _ in range(warmup):
+        call()
+    
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    
+    # Peak memory is measured in a separate call so tracing doesn't skew timings
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "p50_ms": round(_percentile(latencies, 50), 4),
+        "p95_ms": round(_percentile(latencies, 95), 4),
+        "p99_ms": round(_percentile(latencies, 99), 4),
+        "mean_ms": round(sum(latencies) / len(latencies), 4),
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_memory_kb": round(peak / 1024, 1)
+    }
+    print(
+        f"{name:<48} p50={result['p50_ms']:>10.3f}ms p95={result['p95_ms']:>10.3f}ms "
+        f"p99={result['p99_ms']:>10.3f}ms {result['throughput_per_s']:>10.1f}/s "
+        f"peak={result['peak_memory_kb']:>10.1f}KB"
+    )
+    return result
+
+def skipped(name: str, reason: str) -> Dict[str, Any]:
+    print(f"{name:<48} skipped: {reason}")
+    return {"name": name, "skipped": reason}
+
+def make_posts(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    likes = rng.integers(0, 5000, count).tolist()
+    comments = rng.integers(0, 200, count).tolist()
+    start = datetime(2022, 1, 1)
+    return [
+        {"likes": l, "comments": c, "post_date": (start + timedelta(hours=6 * i)).isoformat()}
+        for i, (l, c) in enumerate(zip(likes, comments))
+    ]
+
+def make_request(count: int, seed: int = 0, handle: str = "creator") -> EngagementAnalysisRequest:
+    return EngagementAnalysisRequest(
+        platform="instagram",
+        handle=handle,
+        followers=50000,
+        posts=make_posts(count, seed)
+    )
+
+def _iterations(count: int, quick: bool) -> int:
+    base = 200 if count <= 100 else 50 if count <= 1000 else 10
+    return max(3, base // 5) if quick else base
+
+def bench_analyzer(quick: bool) -> List[Dict[str, Any]]:
+    analyzer = EngagementAnalyzer()
+    results = []
+    for count in POST_COUNTS:
+        request = make_request(count)
+        iterations = _iterations(count, quick)
+        results.append(measure(
+            f"analyzer.analyze_engagement[posts={count}]",
+            lambda: analyzer.analyze_engagement(request), iterations
+        ))
+    
+    for accounts, posts in BATCH_SHAPES:
+        requests = [make_request(posts, seed=i, handle=f"creator{i}") for i in range(accounts)]
+        results.append(measure(
+            f"analyzer.batch[accounts={accounts},posts={posts}]",
+            lambda: analyzer.analyze_engagement_batch(requests), 3 if quick else 10
+        ))
+    return results
+
+def _pdf_data(top_posts: int) -> Dict[str, Any]:
+    return {
+        "username": "benchmark",
+        "full_name": "Benchmark Creator",
+        "handle": "benchmark",
+        "platform": "instagram",
+        "followers": 25000,
+        "engagement_rate": 4.2,
+        "avg_likes": 1000,
+        "avg_comments": 50,
+        "engagement_quality": "good",
+        "bio": "Travel and lifestyle creator sharing everyday adventures.",
+        "top_posts": [
+            {"likes": 1200 + i, "comments": 40 + i, "caption": f"Post number {i}"}
+            for i in range(top_posts)
+        ],
+        "contact_email": "benchmark@example.com",
+        "insights": ["Your engagement rate is 1.7x above industry average"]
+    }
+
+def bench_pdf(quick: bool) -> List[Dict[str, Any]]:
+    try:
+        from app.services.pdf_generator import get_pdf_generator
+        generator = get_pdf_generator()
+    except (ImportError, OSError) as e:
+        return [skipped(f"pdf.generate_media_kit_pdf[top_posts={n}]", str(e).splitlines()[0]) for n in KIT_SIZES]
+    
+    return [
+        measure(
+            f"pdf.generate_media_kit_pdf[top_posts={n}]",
+            lambda n=n: generator.generate_media_kit_pdf(_pdf_data(n)),
+            3 if quick else 15, warmup=1
+        )
+        for n in KIT_SIZES
+    ]
+
+def bench_startup(quick: bool) -> List[Dict[str, Any]]:
+    """Cold import of the application in a fresh interpreter"""
+    command = [sys.executable, "-c", "import app.main"]
+    return [
+        measure(
+            "startup.import_app_main",
+            lambda: subprocess.run(command, check=True, stdout=subprocess.DEVNULL),
+            3 if quick else 10, warmup=1
+        )
+    ]
+
+def bench_api(quick: bool, include_pdf: bool) -> List[Dict[str, Any]]:
+    try:
+        import httpx
+        from jose import jwt
+        from app.main import app
+        from app.database import get_db_operations
+        from app.services.pdf_renderer import pdf_render_pool
+        from app.services.pdf_cache import pdf_cache
+        from app.services.view_buffer import view_buffer
+        from app.services.analysis_writer import analysis_writer
+        from benchmarks.fakes import FakeDatabaseOperations, seed_media_kit
+    except (ImportError, OSError) as e:
+        return [skipped("api", str(e).splitlines()[0])]
+    
+    db = FakeDatabaseOperations()
+    app.dependency_overrides[get_db_operations] = lambda: db
+    kit = seed_media_kit(db, "benchcreator", top_posts=3)
+    token = jwt.encode({"sub": kit["user_id"], "email": "bench@example.com"}, "benchmark")
+    headers = {"Authorization": f"Bearer {token}"}
+    client = httpx.AsyncClient(app=app, base_url="http://localhost")
+    
+    payloads = {count: make_request(count).dict() for count in (10, 1000)}
+    for payload in payloads.values():
+        for post in payload["posts"]:
+            post["post_date"] = post["post_date"].isoformat()
+    batch_payload = {"accounts": [
+        {**payloads[10], "handle": f"creator{i}"} for i in range(100)
+    ]}
+    
+    counter = {"n": 0}
+    
+    def unique(payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Distinct handles keep the analysis cache from serving every call
+        counter["n"] += 1
+        return {**payload, "handle": f"creator{counter['n']}"}
+    
+    async def post(path: str, body: Dict[str, Any]):
+        response = await client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, (path, response.status_code, response.text[:200])
+    
+    async def get(path: str, expect: int = 200):
+        response = await client.get(path, headers=headers)
+        assert response.status_code == expect, (path, response.status_code, response.text[:200])
+    
+    async def download_pdf(cold: bool):
+        # Cold downloads queue a render and poll until it is served; repeat
+        # downloads must hit the cache straight away
+        if not cold:
+            response = await client.get(f"/api/v1/media-kit/{kit['id']}/pdf", headers=headers)
+            assert response.status_code == 200, (response.status_code, response.text[:200])
+            return
+        pdf_cache.clear()
+        while True:
+            response = await client.get(f"/api/v1/media-kit/{kit['id']}/pdf", headers=headers)
+            if response.status_code == 200:
+                return
+            assert response.status_code == 202, (response.status_code, response.text[:200])
+            await asyncio.sleep(0.005)
+    
+    analysis_cache.clear()
+    results = []
+    iterations = 20 if quick else 200
+    for count, payload in payloads.items():
+        results.append(measure(
+            f"api.POST /analyze[posts={count}]",
+            lambda payload=payload: post("/api/v1/analyze", unique(payload)),
+            iterations if count <= 100 else iterations // 4, is_async=True
+        ))
+    results.append(measure(
+        "api.POST /analyze[posts=1000,cached]",
+        lambda: post("/api/v1/analyze", payloads[1000]), iterations, is_async=True
+    ))
+    results.append(measure(
+        "api.POST /analyze/batch[accounts=100,posts=10]",
+        lambda: post("/api/v1/analyze/batch", batch_payload), max(3, iterations // 10), is_async=True
+    ))
+    results.append(measure(
+        "api.GET /media-kit/{username}",
+        lambda: get("/api/v1/media-kit/benchcreator"), iterations, is_async=True
+    ))
+    results.append(measure(
+        "api.POST /media-kit/{username}/view",
+        lambda: post("/api/v1/media-kit/benchcreator/view", {}), iterations, is_async=True
+    ))
+    if include_pdf:
+        results.append(measure(
+            "api.GET /media-kit/{kit_id}/pdf[cold]",
+            lambda: download_pdf(cold=True), 3 if quick else 15,
+            warmup=1, is_async=True
+        ))
+        results.append(measure(
+            "api.GET /media-kit/{kit_id}/pdf[cached]",
+            lambda: download_pdf(cold=False), iterations, is_async=True
+        ))
+    
+    asyncio.get_event_loop().run_until_complete(view_buffer.close())
+    asyncio.get_event_loop().run_until_complete(analysis_writer.close())
+    asyncio.get_event_loop().run_until_complete(client.aclose())
+    app.dependency_overrides.clear()
+    pdf_render_pool.shutdown()
+    return results
+
+def compare(current: Dict[str, Any], baseline_path: str, threshold: float) -> int:
+    """Print per-case deltas against a previous results file; return regressions"""
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"] if "skipped" not in r}
+    
+    regressions = 0
+    print(f"\nComparison against {baseline_path} (regression threshold {threshold:.0%})")
+    for result in current["results"]:
+        old = baseline.get(result["name"])
+        if "skipped" in result or old is None:
+            continue
+        deltas = {
+            key: (result[key] - old[key]) / old[key] if old[key] else 0.0
+            for key in ("p50_ms", "p95_ms", "peak_memory_kb")
+        }
+        regressed = deltas["p50_ms"] > threshold or deltas["p95_ms"] > threshold
+        regressions += regressed
+        print(
+            f"{'REGRESSION ' if regressed else '           '}{result['name']:<48} "
+            + " ".join(f"{key}={delta:+.1%}" for key, delta in deltas.items())
+        )
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run backend performance benchmarks")
+    parser.add_argument("--output", default="benchmark-results.json", help="Results JSON path")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50/p95 slowdown (0.2 = 20%%)")
+    parser.add_argument("--only", choices=["startup", "analyzer", "pdf", "api"], action="append", help="Run a subset")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations for smoke runs")
+    args = parser.parse_args(argv)
+    
+    suites = args.only or ["startup", "analyzer", "pdf", "api"]
+    # Per-request app logging would dominate the timings
+    logging.disable(logging.WARNING)
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    
+    results: List[Dict[str, Any]] = []
+    if "startup" in suites:
+        results += bench_startup(args.quick)
+    if "analyzer" in suites:
+        results += bench_analyzer(args.quick)
+    if "pdf" in suites:
+        results += bench_pdf(args.quick)
+    if "api" in suites:
+        pdf_ok = "pdf" in suites and not any("skipped" in r for r in results if r["name"].startswith("pdf."))
+        results += bench_api(args.quick, include_pdf=pdf_ok)
+    
+    output = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+    
+    if args.compare:
+        return 1 if compare(output, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,31 @@ CREATE TABLE public.engagement_analyses (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Mergeable engagement aggregates for incremental analysis
+CREATE TABLE public.engagement_aggregates (
+    social_account_id UUID REFERENCES public.social_accounts(id) ON DELETE CASCADE PRIMARY KEY,
+    user_id UUID REFERENCES public.profiles(id) ON DELETE CASCADE,
+    post_count BIGINT NOT NULL DEFAULT 0,
+    total_likes BIGINT NOT NULL DEFAULT 0,
+    total_comments BIGINT NOT NULL DEFAULT 0,
+    engagement_sum_squares NUMERIC NOT NULL DEFAULT 0, -- Sum of (likes + comments)^2
+    best_engagement BIGINT NOT NULL DEFAULT 0,
+    best_post JSONB,
+    last_post_date TIMESTAMP WITH TIME ZONE, -- Newest post merged; posts at or before it are skipped
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Engagement rate distributions per platform and follower bucket.
+-- Each row is one bucket of a log-scale quantile sketch; maintained by a
+-- trigger on engagement_analyses so benchmarks never rescan that table.
+CREATE TABLE public.engagement_benchmarks (
+    platform platform_type NOT NULL,
+    follower_bucket SMALLINT NOT NULL,
+    sketch_key INTEGER NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (platform, follower_bucket, sketch_key)
+);
+
 -- Media kits table
 CREATE TABLE public.media_kits (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
@@ -81,8 +106,11 @@ CREATE TABLE public.media_kit_views (
 CREATE INDEX idx_profiles_username ON public.profiles(username);
 CREATE INDEX idx_social_accounts_user_platform ON public.social_accounts(user_id, platform);
 CREATE INDEX idx_social_accounts_handle ON public.social_accounts(handle);
-CREATE INDEX idx_engagement_analyses_user_id ON public.engagement_analyses(user_id);
-CREATE INDEX idx_media_kits_user_id ON public.media_kits(user_id);
+-- (user_id, created_at, id) so newest-first keyset pages are index range scans
+CREATE INDEX idx_engagement_analyses_user_id ON public.engagement_analyses(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_engagement_analyses_account_created ON public.engagement_analyses(social_account_id, created_at DESC);
+CREATE INDEX idx_engagement_aggregates_user_id ON public.engagement_aggregates(user_id);
+CREATE INDEX idx_media_kits_user_id ON public.media_kits(user_id, created_at DESC, id DESC);
 CREATE INDEX idx_media_kits_public ON public.media_kits(is_public) WHERE is_public = true;
 CREATE INDEX idx_media_kit_views_kit_id ON public.media_kit_views(media_kit_id);
 CREATE INDEX idx_media_kit_views_viewed_at ON public.media_kit_views(viewed_at);
@@ -93,6 +121,8 @@ CREATE INDEX idx_media_kit_views_viewed_at ON public.media_kit_views(viewed_at);
 ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.social_accounts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.engagement_analyses ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.engagement_aggregates ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.engagement_benchmarks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.media_kits ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.media_kit_views ENABLE ROW LEVEL SECURITY;
 
@@ -114,6 +144,10 @@ CREATE POLICY "Users can manage own social accounts" ON public.social_accounts
 CREATE POLICY "Users can manage own analyses" ON public.engagement_analyses
     FOR ALL USING (auth.uid() = user_id);
 
+-- Engagement aggregates policies
+CREATE POLICY "Users can manage own engagement aggregates" ON public.engagement_aggregates
+    FOR ALL USING (auth.uid() = user_id);
+
 -- Media kits policies
 CREATE POLICY "Users can manage own media kits" ON public.media_kits
     FOR ALL USING (auth.uid() = user_id);
@@ -158,21 +192,184 @@ CREATE TRIGGER update_media_kits_updated_at
     BEFORE UPDATE ON public.media_kits 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- Function to increment media kit view count
-CREATE OR REPLACE FUNCTION increment_media_kit_views()
+-- Function to record a batch of media kit views in one statement.
+-- Views are bulk-inserted and each kit's view_count gets a single increment
+-- for the whole batch (replacing a per-row trigger, which made popular kits
+-- a hot row). Views of deleted kits are skipped. Returns the new counts.
+DROP TRIGGER IF EXISTS increment_view_count_trigger ON public.media_kit_views;
+DROP FUNCTION IF EXISTS increment_media_kit_views();
+
+CREATE OR REPLACE FUNCTION public.record_media_kit_views(p_views JSONB)
+RETURNS TABLE (media_kit_id UUID, view_count INTEGER) AS $$
+    WITH inserted AS (
+        INSERT INTO public.media_kit_views (media_kit_id, viewer_ip, user_agent, referrer, viewed_at)
+        SELECT v.media_kit_id, v.viewer_ip, v.user_agent, v.referrer, COALESCE(v.viewed_at, NOW())
+        FROM jsonb_to_recordset(p_views) AS v(
+            media_kit_id UUID,
+            viewer_ip INET,
+            user_agent TEXT,
+            referrer TEXT,
+            viewed_at TIMESTAMP WITH TIME ZONE
+        )
+        WHERE EXISTS (SELECT 1 FROM public.media_kits mk WHERE mk.id = v.media_kit_id)
+        RETURNING media_kit_views.media_kit_id
+    ), per_kit AS (
+        SELECT inserted.media_kit_id, COUNT(*) AS views
+        FROM inserted
+        GROUP BY inserted.media_kit_id
+    )
+    UPDATE public.media_kits mk
+    SET view_count = mk.view_count + per_kit.views
+    FROM per_kit
+    WHERE mk.id = per_kit.media_kit_id
+    RETURNING mk.id, mk.view_count;
+$$ language 'sql';
+
+-- Function returning everything a media kit render needs in one round trip:
+-- each kit with its owner's profile, its social account and its engagement
+-- analysis (the one it was built from, else the account's latest). Kits that
+-- don't exist are skipped.
+CREATE OR REPLACE FUNCTION public.get_media_kit_bundles(p_kit_ids UUID[])
+RETURNS TABLE (media_kit JSONB, profile JSONB, social_account JSONB, engagement_analysis JSONB) AS $$
+    SELECT to_jsonb(mk), to_jsonb(p), to_jsonb(sa), to_jsonb(ea)
+    FROM public.media_kits mk
+    LEFT JOIN public.profiles p ON p.id = mk.user_id
+    LEFT JOIN public.social_accounts sa ON sa.id = mk.social_account_id
+    LEFT JOIN LATERAL (
+        -- Two branches so each can use its index
+        SELECT a.* FROM public.engagement_analyses a WHERE a.id = mk.engagement_analysis_id
+        UNION ALL
+        (
+            SELECT a.* FROM public.engagement_analyses a
+            WHERE mk.engagement_analysis_id IS NULL AND a.social_account_id = mk.social_account_id
+            ORDER BY a.created_at DESC
+            LIMIT 1
+        )
+        LIMIT 1
+    ) ea ON TRUE
+    WHERE mk.id = ANY(p_kit_ids);
+$$ language 'sql' STABLE;
+
+-- Function to fold new posts into an account's engagement aggregate.
+-- Only posts newer than the aggregate's last_post_date are merged, so a
+-- retried or overlapping submission can't count a post twice. The row is
+-- locked first so concurrent merges see each other's high-water mark.
+DROP FUNCTION IF EXISTS public.merge_engagement_aggregate(UUID, UUID, BIGINT, BIGINT, BIGINT, NUMERIC, BIGINT, JSONB);
+
+CREATE OR REPLACE FUNCTION public.merge_engagement_aggregate(
+    p_social_account_id UUID,
+    p_user_id UUID,
+    p_posts JSONB
+)
+RETURNS public.engagement_aggregates AS $$
+DECLARE
+    v_aggregate public.engagement_aggregates;
+BEGIN
+    INSERT INTO public.engagement_aggregates (social_account_id, user_id)
+    VALUES (p_social_account_id, p_user_id)
+    ON CONFLICT (social_account_id) DO NOTHING;
+    
+    SELECT * INTO v_aggregate
+    FROM public.engagement_aggregates
+    WHERE social_account_id = p_social_account_id
+    FOR UPDATE;
+    
+    WITH fresh AS (
+        SELECT
+            e.post,
+            e.idx,
+            (e.post->>'likes')::BIGINT AS likes,
+            (e.post->>'comments')::BIGINT AS comments,
+            (e.post->>'likes')::BIGINT + (e.post->>'comments')::BIGINT AS engagement,
+            (e.post->>'post_date')::TIMESTAMP WITH TIME ZONE AS post_date
+        FROM jsonb_array_elements(p_posts) WITH ORDINALITY AS e(post, idx)
+        WHERE v_aggregate.last_post_date IS NULL
+            OR (e.post->>'post_date')::TIMESTAMP WITH TIME ZONE > v_aggregate.last_post_date
+    ), delta AS (
+        SELECT
+            COUNT(*) AS post_count,
+            COALESCE(SUM(likes), 0) AS total_likes,
+            COALESCE(SUM(comments), 0) AS total_comments,
+            COALESCE(SUM(engagement::NUMERIC * engagement), 0) AS engagement_sum_squares,
+            MAX(post_date) AS last_post_date
+        FROM fresh
+    ), best AS (
+        -- Earlier posts keep ties, matching a full recompute
+        SELECT engagement, post
+        FROM fresh
+        WHERE engagement > 0
+        ORDER BY engagement DESC, idx
+        LIMIT 1
+    )
+    UPDATE public.engagement_aggregates agg SET
+        post_count = agg.post_count + delta.post_count,
+        total_likes = agg.total_likes + delta.total_likes,
+        total_comments = agg.total_comments + delta.total_comments,
+        engagement_sum_squares = agg.engagement_sum_squares + delta.engagement_sum_squares,
+        best_engagement = GREATEST(agg.best_engagement, COALESCE(best.engagement, 0)),
+        best_post = CASE
+            WHEN best.engagement > agg.best_engagement THEN best.post
+            ELSE agg.best_post
+        END,
+        last_post_date = GREATEST(agg.last_post_date, delta.last_post_date),
+        updated_at = NOW()
+    FROM delta LEFT JOIN best ON TRUE
+    WHERE agg.social_account_id = p_social_account_id
+    RETURNING agg.* INTO v_aggregate;
+    
+    RETURN v_aggregate;
+END;
+$$ language 'plpgsql';
+
+-- Follower bucket index; must match FOLLOWER_BUCKETS in app/services/benchmarks.py
+CREATE OR REPLACE FUNCTION public.follower_bucket(p_followers INTEGER)
+RETURNS SMALLINT AS $$
+    SELECT CASE
+        WHEN p_followers >= 100000 THEN 5
+        WHEN p_followers >= 50000 THEN 4
+        WHEN p_followers >= 10000 THEN 3
+        WHEN p_followers >= 5000 THEN 2
+        WHEN p_followers >= 1000 THEN 1
+        ELSE 0
+    END::SMALLINT;
+$$ language 'sql' IMMUTABLE;
+
+-- Sketch bucket key (1% relative accuracy); must match sketch_key() in app/services/benchmarks.py
+CREATE OR REPLACE FUNCTION public.benchmark_sketch_key(p_rate DOUBLE PRECISION)
+RETURNS INTEGER AS $$
+    SELECT CEIL(LN(GREATEST(p_rate, 0.0001)) / LN(1.01 / 0.99))::INTEGER;
+$$ language 'sql' IMMUTABLE;
+
+-- Function to add each stored analysis to the benchmark sketches
+CREATE OR REPLACE FUNCTION record_engagement_benchmark()
 RETURNS TRIGGER AS $$
+DECLARE
+    v_platform platform_type;
+    v_followers INTEGER;
 BEGIN
-    UPDATE public.media_kits 
-    SET view_count = view_count + 1 
-    WHERE id = NEW.media_kit_id;
+    SELECT platform, followers INTO v_platform, v_followers
+    FROM public.social_accounts
+    WHERE id = NEW.social_account_id;
+    
+    IF v_platform IS NOT NULL THEN
+        INSERT INTO public.engagement_benchmarks (platform, follower_bucket, sketch_key, count)
+        VALUES (
+            v_platform,
+            public.follower_bucket(v_followers),
+            public.benchmark_sketch_key(NEW.engagement_rate::DOUBLE PRECISION),
+            1
+        )
+        ON CONFLICT (platform, follower_bucket, sketch_key)
+        DO UPDATE SET count = public.engagement_benchmarks.count + 1;
+    END IF;
     RETURN NEW;
 END;
 $$ language 'plpgsql';
 
--- Trigger to auto-increment view count
-CREATE TRIGGER increment_view_count_trigger
-    AFTER INSERT ON public.media_kit_views
-    FOR EACH ROW EXECUTE FUNCTION increment_media_kit_views();
+-- Trigger to keep benchmarks current on every insert
+CREATE TRIGGER record_engagement_benchmark_trigger
+    AFTER INSERT ON public.engagement_analyses
+    FOR EACH ROW EXECUTE FUNCTION record_engagement_benchmark();
 
 -- Function to create profile on user signup
 CREATE OR REPLACE FUNCTION public.handle_new_user()